@@ -0,0 +1,308 @@
+"""Guess the tightest bound of the form C * prod x^a * (1+Log[x])^b numerically.
+
+Instead of asking the user for `rhs` / `conjectured_upper_asymptotic_bound`,
+the quantity to bound (the lhs of a question, or the sum of a series as a
+function of its other variables) is evaluated on a log-spaced grid over the
+domain. A least-squares fit of its logarithm against log x and
+log(1 + Log[x]) picks the neighbourhood of the exponent lattice (powers
+that are multiples of 1/q for the given denominators q, by default halves
+and thirds; integer powers of logs) worth looking at. Every lattice point
+there is scored on the grid:
+
+- bounded above: the ratio f / bound does not keep growing as variables
+  tend to 0 or oo (its maximum over the whole grid is close to its maximum
+  away from those ends of the grid);
+- bounded below: the same for the minimum, i.e. the bound is also tight;
+- spread: max - min of log(f / bound), smaller is tighter.
+
+Only the few best candidates are sent through the usual LLM + CAS pipeline;
+the numerics here only rank guesses, they never prove anything. Candidates
+that are a constant multiple of the lhs of a question are skipped, since
+proving lhs << lhs says nothing.
+"""
+import math
+from dataclasses import dataclass, field, replace
+from fractions import Fraction
+from itertools import product
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import mpmath
+import sympy as sp
+
+from dominance import to_sympy
+from portfolio import numeric_test
+from shared import split_conditions, split_top_level
+
+__all__ = ["BoundFit", "fit_bounds", "discover"]
+
+# Grid points per variable (questions / series, whose sums are costlier)
+_POINTS = 9
+_SERIES_POINTS = 7
+# Denominators of the power lattice
+_DENOMINATORS = (2, 3)
+
+
+@dataclass
+class BoundFit:
+    bound: str
+    powers: Dict[str, Fraction] = field(default_factory=dict)
+    logs: Dict[str, int] = field(default_factory=dict)
+    spread: float = math.inf
+    bounded_above: bool = False
+    bounded_below: bool = False
+
+    @property
+    def complexity(self) -> int:
+        return sum(1 for p in self.powers.values() if p) + sum(1 for k in self.logs.values() if k)
+
+    @property
+    def key(self) -> Tuple[bool, bool, float, int]:
+        return (not self.bounded_above, not self.bounded_below, round(self.spread, 2), self.complexity)
+
+
+def _names(text: str) -> List[str]:
+    text = text.strip()
+    if text.startswith("{") and text.endswith("}"):
+        text = text[1:-1]
+    return [v.strip() for v in split_top_level(text) if v.strip()]
+
+
+def _atoms(text: str) -> List[str]:
+    return split_conditions(text)
+
+
+def _ranges(names: List[str], atoms: List[str]) -> Dict[str, Tuple[float, float, bool, bool, bool]]:
+    """name -> (lo, hi, lo asymptotic, hi asymptotic, log feature) of the grid.
+
+    Constant bounds in the domain fix the ends; an end is asymptotic when the
+    variable tends to 0 or oo there. Variables without a positive lower bound
+    are sampled on (0, oo) only.
+    """
+    lower = {n: 0.0 for n in names}
+    upper = {n: math.inf for n in names}
+    for atom in atoms:
+        try:
+            rel = to_sympy(atom)
+        except Exception:
+            continue
+        if isinstance(rel, (sp.StrictGreaterThan, sp.GreaterThan)):
+            small, big = rel.rhs, rel.lhs
+        elif isinstance(rel, (sp.StrictLessThan, sp.LessThan)):
+            small, big = rel.lhs, rel.rhs
+        else:
+            continue
+        if big.is_Symbol and big.name in lower and small.is_number:
+            lower[big.name] = max(lower[big.name], float(small))
+        elif small.is_Symbol and small.name in upper and big.is_number:
+            upper[small.name] = min(upper[small.name], float(big))
+    out = {}
+    for n in names:
+        lo = lower[n] * 1.1 if lower[n] > 0 else 1e-3
+        hi = upper[n] * 0.95 if math.isfinite(upper[n]) else max(lo * 1e4, 1e3)
+        out[n] = (lo, max(hi, lo * 1.01), lower[n] <= 0, not math.isfinite(upper[n]), lower[n] >= 1)
+    return out
+
+
+def _grid(ranges, names: List[str], n: int):
+    """All grid points and whether each stays away from the asymptotic ends of every axis."""
+    axes = []
+    for name in names:
+        lo, hi, to_zero, to_inf, _ = ranges[name]
+        first = n // 4 if to_zero else 0
+        last = n - 1 - n // 4 if to_inf else n - 1
+        axes.append([(lo * (hi / lo) ** (i / (n - 1)), first <= i <= last) for i in range(n)])
+    for combo in product(*axes):
+        yield [v for v, _ in combo], all(inner for _, inner in combo)
+
+
+def _series_sum(series) -> Tuple[List[str], Callable[..., float]]:
+    """Other variables of `series` and a numeric evaluator of the whole sum."""
+    names = _names(series.other_variables)
+    index = sp.Symbol(series.summation_index)
+    symbols = [sp.Symbol(n) for n in names]
+    term = sp.lambdify([index] + symbols, to_sympy(series.formula), "mpmath")
+    lo_f = sp.lambdify(symbols, to_sympy(series.summation_bounds[0]), "mpmath")
+    hi_e = to_sympy(series.summation_bounds[1])
+    hi_f = None if hi_e == sp.oo else sp.lambdify(symbols, hi_e, "mpmath")
+
+    def total(*point: float) -> float:
+        start = int(mpmath.ceil(lo_f(*point)))
+        end = mpmath.inf if hi_f is None else mpmath.floor(hi_f(*point))
+        # Direct sum of the first terms, then the integral of the tail over
+        # geometrically growing pieces, which handles plateaus at large scales
+        head_end = start + 64 if end == mpmath.inf else min(start + 64, int(end) + 1)
+        s = mpmath.fsum(term(k, *point) for k in range(start, head_end))
+        if end == mpmath.inf or head_end <= end:
+            cuts = [head_end]
+            while cuts[-1] < (1e15 if end == mpmath.inf else end):
+                cuts.append(cuts[-1] * 4)
+            cuts[-1] = end
+            s += mpmath.quad(lambda x: term(x, *point), cuts)
+        return float(s)
+
+    return names, total
+
+
+def _lstsq(rows: List[List[float]], ys: List[float]) -> List[float]:
+    """Ridge-regularised least squares via the normal equations."""
+    k = len(rows[0])
+    a = [[sum(r[i] * r[j] for r in rows) + (1e-9 if i == j else 0.0) for j in range(k)] for i in range(k)]
+    b = [sum(r[i] * y for r, y in zip(rows, ys)) for i in range(k)]
+    for col in range(k):
+        pivot = max(range(col, k), key=lambda r: abs(a[r][col]))
+        a[col], a[pivot] = a[pivot], a[col]
+        b[col], b[pivot] = b[pivot], b[col]
+        if abs(a[col][col]) < 1e-15:
+            continue
+        for r in range(k):
+            if r != col:
+                f = a[r][col] / a[col][col]
+                a[r] = [x - f * y for x, y in zip(a[r], a[col])]
+                b[r] -= f * b[col]
+    return [b[i] / a[i][i] if abs(a[i][i]) >= 1e-15 else 0.0 for i in range(k)]
+
+
+def _render(powers: Dict[str, Fraction], logs: Dict[str, int]) -> str:
+    factors = []
+    for n, p in powers.items():
+        if p == 1:
+            factors.append(n)
+        elif p:
+            factors.append(f"{n}^({p})" if p.denominator != 1 or p < 0 else f"{n}^{p}")
+    for n, k in logs.items():
+        if k:
+            factors.append("(1+Log[" + n + "])" + ("" if k == 1 else f"^{k}"))
+    return "*".join(factors) or "1"
+
+
+def fit_bounds(
+    names: List[str],
+    atoms: List[str],
+    f: Callable[..., float],
+    *,
+    points: int = _POINTS,
+    tolerance: Optional[float] = None,
+    denominators: Sequence[int] = _DENOMINATORS,
+) -> List[BoundFit]:
+    """Score the lattice of bounds near the least-squares fit of log f; best first.
+
+    Powers are multiples of 1/q for each q in `denominators`, within one
+    step of the fit. `tolerance` is how much log(f / bound) may still grow
+    towards the asymptotic ends of the grid. By default it is half of what
+    the smallest gap between neighbouring exponents changes there, so
+    neighbouring candidates are told apart.
+    """
+    ranges = _ranges(names, atoms)
+    symbols = [sp.Symbol(n) for n in names]
+    in_domain = numeric_test(atoms, symbols)
+    log_vars = [n for n in names if ranges[n][4]]
+
+    rows, ys, inner = [], [], []
+    for point, is_inner in _grid(ranges, names, points):
+        if not in_domain(point):
+            continue
+        try:
+            value = f(*point)
+        except (ArithmeticError, ValueError, TypeError, OverflowError):
+            continue
+        if not (isinstance(value, (int, float)) and value > 0 and math.isfinite(value)):
+            continue
+        v = dict(zip(names, point))
+        rows.append([math.log(v[n]) for n in names] + [math.log(1 + math.log(v[n])) for n in log_vars])
+        ys.append(math.log(value))
+        inner.append(is_inner)
+    if len(rows) < 4 or not any(inner):
+        return []
+
+    theta = _lstsq([r + [1.0] for r in rows], ys)[:-1]
+    # Powers near the fit for every denominator, and integer log powers
+    choices = [
+        sorted({Fraction(round(q * t) + d, q) for q in denominators for d in (-1, 0, 1)})
+        for t in theta[:len(names)]
+    ]
+    choices += [sorted({max(0, round(t) + d) for d in (-1, 0, 1)}) for t in theta[len(names):]]
+
+    if tolerance is None:
+        gaps = []
+        steps = [float(min(b - a for a, b in zip(c, c[1:]))) for c in choices]
+        for j, step in enumerate(steps):
+            col = [r[j] for r in rows]
+            col_inner = [x for x, i in zip(col, inner) if i]
+            gaps += [step * (max(col) - max(col_inner)), step * (min(col_inner) - min(col))]
+        tolerance = 0.5 * min((g for g in gaps if g > 1e-12), default=1.0)
+
+    fits = []
+    for combo in product(*choices):
+        coeffs = [float(c) for c in combo]
+        logr = [y - sum(c * x for c, x in zip(coeffs, r)) for r, y in zip(rows, ys)]
+        inner_r = [v for v, i in zip(logr, inner) if i]
+        powers = dict(zip(names, combo[:len(names)]))
+        logs = dict(zip(log_vars, (int(c) for c in combo[len(names):])))
+        fits.append(BoundFit(
+            bound=_render(powers, logs),
+            powers=powers,
+            logs=logs,
+            spread=max(logr) - min(logr),
+            bounded_above=max(logr) - max(inner_r) <= tolerance,
+            bounded_below=min(inner_r) - min(logr) <= tolerance,
+        ))
+    fits.sort(key=lambda fit: fit.key)
+    return fits
+
+
+def _target(kind: str, problem: Any):
+    """(names, domain atoms, evaluator, expression or None) of the quantity to bound."""
+    if kind == "series":
+        names, total = _series_sum(problem)
+        return names, split_conditions(problem.conditions), total, None
+    names = _names(problem.variables)
+    expr = to_sympy(problem.lhs)
+    lhs = sp.lambdify([sp.Symbol(n) for n in names], expr, "math")
+    return names, _atoms(problem.domain_description), lhs, expr
+
+
+def _multiple_of(bound: str, expr: sp.Expr, names: List[str]) -> bool:
+    """Whether `bound` is a constant multiple of `expr` for positive variables."""
+    positive = {sp.Symbol(n): sp.Symbol(n, positive=True) for n in names}
+    ratio = sp.simplify(sp.powsimp((expr / to_sympy(bound)).xreplace(positive), force=True))
+    return ratio.is_number
+
+
+def discover(kind: str, problem: Any, *, top: int = 3, verify: bool = True) -> Optional[BoundFit]:
+    """Print the best bounds for `problem` and try to prove the `top` plausible ones in turn.
+
+    Returns the first proved fit (or, with verify=False, the best one).
+    """
+    names, atoms, f, expr = _target(kind, problem)
+    fits = fit_bounds(names, atoms, f, points=_SERIES_POINTS if kind == "series" else _POINTS)
+    skipped = []
+    if expr is not None:
+        skipped = [fit.bound for fit in fits if fit.bounded_above and _multiple_of(fit.bound, expr, names)]
+        fits = [fit for fit in fits if fit.bound not in skipped]
+    plausible = [fit for fit in fits if fit.bounded_above][:top]
+    print("Candidate bounds (best first):")
+    for bound in skipped:
+        print(f"  skipped {bound}: a constant multiple of the lhs")
+    for fit in plausible:
+        tight = "tight" if fit.bounded_below else "upper only"
+        print(f"  {fit.bound:<30} spread {fit.spread:.2f}, {tight}")
+    if not plausible:
+        print("  none: the quantity does not look bounded by any candidate on the grid")
+        return None
+    if not verify:
+        return plausible[0]
+
+    from mathematica_export import try_and_prove
+    from series_summation import ask_llm_series
+
+    for fit in plausible:
+        print(f"--- Trying bound {fit.bound} ---")
+        if kind == "series":
+            proved = ask_llm_series(replace(problem, conjectured_upper_asymptotic_bound=fit.bound))
+        else:
+            proved = try_and_prove(replace(problem, rhs=fit.bound))
+        if proved:
+            print(f"Proved with bound {fit.bound}")
+            return fit
+    print("None of the candidate bounds could be proved")
+    return None
@@ -0,0 +1,196 @@
+"""Versioned proof certificates and CAS-only re-checking.
+
+A certificate records everything needed to re-confirm a proof without the
+LLM: the problem, the decomposition that was verified, and for every region
+the constant exponent c (the bound is `lhs <= 10^c * rhs`), the exact
+Wolfram Language query that was sent and the verdict it returned.
+
+`recheck` replays the stored queries in parallel, one wolframscript kernel
+per worker, and reports any verdict that changed (e.g. after a Mathematica
+upgrade).
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+__all__ = [
+    "CERTIFICATE_VERSION",
+    "Check",
+    "ProofCertificate",
+    "default_store",
+    "problem_key",
+    "save",
+    "load",
+    "load_all",
+    "recheck",
+]
+
+CERTIFICATE_VERSION = 1
+
+
+@dataclass
+class Check:
+    region: str
+    constant: int
+    query: str
+    verdict: str
+    # Reductions (symmetry, dominant terms) applied before `query` was built
+    reduction: str = ""
+    # Empty when `verdict` came from the CAS, else the name of the local
+    # verifier that produced it (see `local_verifiers`) and its arguments
+    # (variables, conditions, lhs, rhs); `query` is the Resolve equivalent
+    verifier: str = ""
+    verifier_args: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ProofCertificate:
+    kind: str
+    problem: Dict[str, Any]
+    decomposition: List[str]
+    checks: List[Check]
+    # Both problem.lhs << problem.rhs and the reverse bound were certified
+    two_sided: bool = False
+    # Classes of the symmetric chamber (see `symmetry.Chamber`) that the
+    # decomposition covers; every region was intersected with it. Empty when
+    # the decomposition covers the whole domain.
+    chamber: List[List[str]] = field(default_factory=list)
+    version: int = CERTIFICATE_VERSION
+    created: float = field(default_factory=time.time)
+
+    @property
+    def proved(self) -> bool:
+        return bool(self.checks) and all(ch.verdict == "True" for ch in self.checks)
+
+    @property
+    def key(self) -> str:
+        return problem_key(self.kind, self.problem, self.two_sided)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), indent=1, sort_keys=True)
+
+    @classmethod
+    def from_json(cls, text: str) -> "ProofCertificate":
+        data = json.loads(text)
+        if data.get("version") != CERTIFICATE_VERSION:
+            raise ValueError(f"Unsupported certificate version: {data.get('version')!r}")
+        data["checks"] = [Check(**ch) for ch in data["checks"]]
+        return cls(**data)
+
+
+def default_store() -> str:
+    """Directory holding certificates; `$DECOMP_CERTIFICATES` overrides ./certificates."""
+    return os.environ.get("DECOMP_CERTIFICATES") or os.path.join(os.getcwd(), "certificates")
+
+
+def problem_key(kind: str, problem: Any, two_sided: bool = False) -> str:
+    """Stable short hash of a `question` / `series_to_bound` (or its asdict).
+
+    Two-sided certificates get their own key, so they do not overwrite the
+    one-sided certificate of the same problem (or the other way round).
+    """
+    if not isinstance(problem, dict):
+        problem = asdict(problem)
+    data = {"kind": kind, "problem": problem}
+    if two_sided:
+        data["two_sided"] = True
+    blob = json.dumps(data, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def _path(kind: str, key: str, store: Optional[str]) -> str:
+    return os.path.join(store or default_store(), f"{kind}-{key}.json")
+
+
+def save(cert: ProofCertificate, store: Optional[str] = None) -> str:
+    path = _path(cert.kind, cert.key, store)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # A unique temp file per writer, so concurrent saves of one key cannot collide
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(cert.to_json())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return path
+
+
+def load(kind: str, problem: Any, store: Optional[str] = None, two_sided: bool = False) -> Optional[ProofCertificate]:
+    """The certificate of `problem`; a two-sided one also serves a one-sided request."""
+    for sided in (two_sided, True):
+        path = _path(kind, problem_key(kind, problem, sided), store)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return ProofCertificate.from_json(f.read())
+    return None
+
+
+def load_all(store: Optional[str] = None) -> List[ProofCertificate]:
+    store = store or default_store()
+    if not os.path.isdir(store):
+        return []
+    certs = []
+    for name in sorted(os.listdir(store)):
+        # Dotfiles hold derived data (e.g. the retrieval index), not certificates
+        if not name.endswith(".json") or name.startswith("."):
+            continue
+        with open(os.path.join(store, name), "r", encoding="utf-8") as f:
+            try:
+                certs.append(ProofCertificate.from_json(f.read()))
+            except (ValueError, TypeError, KeyError) as e:
+                print(f"Skipping {name}: {e}")
+    return certs
+
+
+def recheck(
+    certs: List[ProofCertificate],
+    *,
+    jobs: Optional[int] = None,
+    evaluate: Optional[Callable[[str], str]] = None,
+) -> List[Tuple[ProofCertificate, List[str]]]:
+    """Replay every check; return (certificate, new verdicts) pairs.
+
+    Checks closed by a local verifier are replayed with that verifier; the
+    rest, and local checks whose replay fails, replay their Resolve query.
+    Queries of all certificates share one pool of at most `jobs` kernels
+    (default: CPU count), admitted under the memory budget of
+    `kernels.KernelScheduler`. A custom `evaluate` is run in a thread pool
+    instead.
+    """
+    from local_verifiers import replay
+
+    checks = [ch for cert in certs for ch in cert.checks]
+    local = []
+    for ch in checks:
+        proof = replay(ch.verifier, ch.verifier_args, ch.constant) if ch.verifier else None
+        local.append(proof is not None and proof.proved)
+    flat = [ch.query for ch, done in zip(checks, local) if not done]
+    if evaluate is None:
+        from kernels import run_parallel
+
+        remote = [v or "" for v in run_parallel(flat, jobs=jobs)]
+    else:
+        def run(query: str) -> str:
+            try:
+                return evaluate(query)
+            except Exception as e:
+                return f"Error: {e}"
+
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+            remote = list(pool.map(run, flat))
+    answers = iter(remote)
+    verdicts = ["True" if done else next(answers) for done in local]
+
+    out = []
+    i = 0
+    for cert in certs:
+        out.append((cert, verdicts[i:i + len(cert.checks)]))
+        i += len(cert.checks)
+    return out
@@ -3,6 +3,7 @@ import argparse
 
 from series_summation import series_to_bound, ask_llm_series
 from mathematica_export import question, try_and_prove
+from certificates import load_all, problem_key, recheck
 
 def _load_examples():
     try:
@@ -22,6 +23,13 @@ def _load_examples():
     }
     return series, questions
 
+def _describe(cert) -> str:
+    p = cert.problem
+    rel = ">><<" if cert.two_sided else "<<"
+    if cert.kind == "series":
+        return f"Sum {p['formula']} {rel} {p['conjectured_upper_asymptotic_bound']}"
+    return f"{p['lhs']} {rel} {p['rhs']} on {p['domain_description']}"
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         prog="decomp",
@@ -31,6 +39,15 @@ def main() -> None:
         "--wolframscript",
         help="Path to wolframscript (overrides env and auto-detect)",
     )
+    parser.add_argument(
+        "--memory-budget",
+        help="Memory shared by parallel CAS kernels, e.g. 16G (default: 80%% of available memory)",
+    )
+    parser.add_argument(
+        "--interval-budget",
+        type=float,
+        help="Seconds the local interval prover may spend per region before Mathematica is used (0 disables it; default 2)",
+    )
     sub = parser.add_subparsers(dest="cmd", required=True)
 
     # List
@@ -38,14 +55,45 @@ def main() -> None:
     # Series
     p_series = sub.add_parser("series", help="Run a series example")
     p_series.add_argument("name", help="Example name in examples.py (e.g., series_1)")
+    p_series.add_argument("--two-sided", action="store_true", help="Also check the bound from below on the subrange estimates (evidence, not a proof)")
     # Prove
     p_prove = sub.add_parser("prove", help="Run an inequality proof example")
     p_prove.add_argument("name", help="Question name in examples.py (e.g., question_1)")
+    p_prove.add_argument("--two-sided", action="store_true", help="Also prove rhs << lhs on the same decomposition")
+    # Sweep
+    p_sweep = sub.add_parser("sweep", help="Prove an example for several values of a parameter")
+    p_sweep.add_argument("name", help="Question or series in examples.py used as the template")
+    p_sweep.add_argument("--param", required=True, help="Symbol in the template to sweep (e.g., a)")
+    p_sweep.add_argument("--values", required=True, nargs="+", help="Parameter values as Mathematica expressions")
+    # Recheck
+    p_recheck = sub.add_parser("recheck", help="Re-verify stored proof certificates with the CAS only")
+    p_recheck.add_argument("names", nargs="*", help="Only these examples (default: every stored certificate)")
+    p_recheck.add_argument("--store", help="Certificate directory (default: $DECOMP_CERTIFICATES or ./certificates)")
+    p_recheck.add_argument("-j", "--jobs", type=int, help="Number of parallel kernels (default: CPU count)")
+    # Discover
+    p_discover = sub.add_parser("discover", help="Guess the tightest bound numerically, then prove the best guesses")
+    p_discover.add_argument("name", help="Question or series in examples.py (its rhs / conjectured bound is ignored)")
+    p_discover.add_argument("--top", type=int, default=3, help="Number of candidate bounds to try proving (default 3)")
+    p_discover.add_argument("--no-verify", action="store_true", help="Only print the candidate bounds")
+    # Watch
+    p_watch = sub.add_parser("watch", help="Re-verify the examples that change while examples.py is edited")
+    p_watch.add_argument("--file", default="examples.py", help="File to watch (default: examples.py)")
+    p_watch.add_argument("--interval", type=float, default=1.0, help="Polling interval in seconds")
 
     args = parser.parse_args()
 
     if args.wolframscript:
         os.environ["WOLFRAMSCRIPT"] = args.wolframscript
+    if args.memory_budget:
+        os.environ["DECOMP_MEMORY_BUDGET"] = args.memory_budget
+    if args.interval_budget is not None:
+        os.environ["DECOMP_INTERVAL_BUDGET"] = str(args.interval_budget)
+
+    if args.cmd == "watch":
+        from watch import watch
+
+        watch(args.file, interval=args.interval)
+        return
 
     series_map, question_map = _load_examples()
 
@@ -65,7 +113,7 @@ def main() -> None:
         if obj is None:
             choices = ", ".join(sorted(series_map)) or "<none>"
             raise SystemExit(f"Unknown series '{args.name}'. Choose one of: {choices}")
-        ask_llm_series(obj)
+        ask_llm_series(obj, two_sided=args.two_sided)
         return
 
     if args.cmd == "prove":
@@ -73,7 +121,65 @@ def main() -> None:
         if obj is None:
             choices = ", ".join(sorted(question_map)) or "<none>"
             raise SystemExit(f"Unknown question '{args.name}'. Choose one of: {choices}")
-        try_and_prove(obj)
+        try_and_prove(obj, two_sided=args.two_sided)
+        return
+
+    if args.cmd == "sweep":
+        from sweep import print_table, sweep_question, sweep_series
+
+        if args.name in question_map:
+            members = sweep_question(question_map[args.name], args.param, args.values)
+        elif args.name in series_map:
+            members = sweep_series(series_map[args.name], args.param, args.values)
+        else:
+            raise SystemExit(f"Unknown example '{args.name}'")
+        print_table(args.param, members)
+        return
+
+    if args.cmd == "discover":
+        from bound_discovery import discover
+
+        if args.name in question_map:
+            discover("question", question_map[args.name], top=args.top, verify=not args.no_verify)
+        elif args.name in series_map:
+            discover("series", series_map[args.name], top=args.top, verify=not args.no_verify)
+        else:
+            raise SystemExit(f"Unknown example '{args.name}'")
+        return
+
+    if args.cmd == "recheck":
+        certs = load_all(args.store)
+        labels = {}
+        for n in args.names:
+            if n in series_map:
+                kind, problem = "series", series_map[n]
+            elif n in question_map:
+                kind, problem = "question", question_map[n]
+            else:
+                raise SystemExit(f"Unknown example '{n}'")
+            for two_sided in (False, True):
+                labels[problem_key(kind, problem, two_sided)] = n
+        if args.names:
+            certs = [c for c in certs if c.key in labels]
+        if not certs:
+            print("No certificates found")
+            return
+        changed = 0
+        for cert, verdicts in recheck(certs, jobs=args.jobs):
+            # Local verdicts that neither their verifier nor Resolve confirm
+            # (e.g. the verifier is no longer registered) are reported apart,
+            # but the certificate no longer verifies all the same
+            diff = [ch.region for ch, v in zip(cert.checks, verdicts) if v != ch.verdict and not ch.verifier]
+            local = [ch for ch, v in zip(cert.checks, verdicts) if v != ch.verdict and ch.verifier]
+            status = "CHANGED" if diff else "LOCAL" if local else "OK"
+            print(f"{status:8} {labels.get(cert.key, cert.kind + '-' + cert.key)}: {_describe(cert)}")
+            for region in diff:
+                print(f"         verdict changed in {region}")
+            for ch in local:
+                print(f"         local verdict ({ch.verifier}) not reproduced in {ch.region}")
+            changed += bool(diff or local)
+        if changed:
+            raise SystemExit(f"{changed} certificate(s) no longer verify")
         return
 
 if __name__ == "__main__":
@@ -0,0 +1,135 @@
+"""Agreement between LLM samples, up to harmless differences.
+
+`api_call` used to stop only when two samples were byte-identical, so
+answers that differ in whitespace, in the order of the subdomains, in
+`a < b` versus `b > a`, or in repeating the base domain conditions were
+counted as disagreements. Samples are now compared through a canonical
+form, and a value is accepted once k of at most n samples agree.
+"""
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+from shared import split_conditions, split_top_level
+
+__all__ = [
+    "canonical_atom",
+    "canonical_regions",
+    "canonical_breakpoints",
+    "Consensus",
+    "vote",
+]
+
+
+def _strip_brackets(text: str) -> str:
+    text = text.strip()
+    if text[:1] in "[{" and text[-1:] in "]}":
+        text = text[1:-1]
+    return text
+
+
+def canonical_atom(atom: str) -> str:
+    """One condition in canonical form: parsed, simplified, oriented with < or <=."""
+    compact = "".join(atom.split())
+    try:
+        import sympy as sp
+        from dominance import to_sympy, to_wl
+
+        rel = to_sympy(atom)
+        if isinstance(rel, (sp.StrictGreaterThan, sp.GreaterThan)):
+            op = "<" if isinstance(rel, sp.StrictGreaterThan) else "<="
+            return f"{to_wl(rel.rhs)}{op}{to_wl(rel.lhs)}".replace(" ", "")
+        if isinstance(rel, (sp.StrictLessThan, sp.LessThan)):
+            op = "<" if isinstance(rel, sp.StrictLessThan) else "<="
+            return f"{to_wl(rel.lhs)}{op}{to_wl(rel.rhs)}".replace(" ", "")
+        return to_wl(rel).replace(" ", "")
+    except Exception:
+        return compact
+
+
+def _atoms(text: str) -> List[str]:
+    return split_conditions(text)
+
+
+def canonical_regions(text: str, base_conditions: Iterable[str] = ()) -> str:
+    """Canonical form of "[c1 && c2, c3 && c4, ...]".
+
+    Conditions inside a region and the regions themselves are sorted, and
+    conditions that merely restate `base_conditions` are dropped (a region
+    that is only the base domain becomes "True").
+    """
+    base = {canonical_atom(a) for a in base_conditions}
+    regions = set()
+    for region in split_top_level(_strip_brackets(text)):
+        atoms = sorted({canonical_atom(a) for a in split_conditions(region)} - base)
+        regions.add(" && ".join(atoms) or "True")
+    return "[" + ", ".join(sorted(regions)) + "]"
+
+
+def canonical_breakpoints(text: str) -> str:
+    """Canonical form of "[0, d1, ..., Infinity]"; the order is kept."""
+    return "[" + ", ".join(canonical_atom(p) for p in split_top_level(_strip_brackets(text))) + "]"
+
+
+@dataclass
+class Consensus:
+    """Outcome of `vote`.
+
+    - value: canonical form of the most voted answer
+    - raw: the first sample that produced it
+    - votes / samples: its support and the number of samples drawn
+    - reached: whether it got the required k votes
+    """
+    value: str
+    raw: str
+    votes: int
+    samples: int
+    reached: bool
+    tally: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def confidence(self) -> float:
+        return self.votes / self.samples if self.samples else 0.0
+
+
+def vote(
+    draw: Callable[[], str],
+    *,
+    canonical: Callable[[str], str] = canonical_regions,
+    k: int = 2,
+    n: int = 15,
+) -> Optional[Consensus]:
+    """Draw up to `n` samples and stop as soon as one canonical answer has `k` votes.
+
+    Empty samples and samples whose canonical form is empty never count.
+    Returns None if nothing usable was drawn; otherwise the leading answer,
+    with `reached` telling whether it met the k-of-n threshold.
+    """
+    tally: Dict[str, int] = {}
+    first: Dict[str, str] = {}
+    drawn = 0
+    for _ in range(n):
+        raw = draw().strip()
+        drawn += 1
+        if not raw:
+            continue
+        try:
+            key = canonical(raw)
+        except Exception:
+            key = raw
+        if not key or key == "[]":
+            continue
+        tally[key] = tally.get(key, 0) + 1
+        first.setdefault(key, raw)
+        if tally[key] >= k:
+            break
+    if not tally:
+        return None
+    best = max(tally, key=lambda c: tally[c])
+    return Consensus(
+        value=best,
+        raw=first[best],
+        votes=tally[best],
+        samples=drawn,
+        reached=tally[best] >= k,
+        tally=tally,
+    )
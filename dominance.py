@@ -0,0 +1,408 @@
+"""Python-side asymptotic dominance for products of powers, logs and exponentials.
+
+`LeadingSummand` in the series prelude asks Mathematica to `Resolve` a
+`ForAll` statement for every term of every factor. For the usual summands
+(products of powers of the parameters, with the odd Log[] or Exp[]) and
+interval assumptions such as `d > h && d < h*m && h > 1`, the comparison can
+be decided syntactically: the ratio of two monomials is >= 1 on the region
+whenever its exponent vector is a non-negative combination of the exponent
+vectors of the monomials the assumptions bound below by a constant.
+
+Everything here is conservative: a comparison is only reported as decided
+when the argument above certifies it exactly. Undecided factors are handed
+back to Mathematica as `LeadingSummand[factor, assumptions]`.
+
+The same comparisons shrink inequalities before `Resolve` (`dominant_reduction`):
+a sum of n summands, one of which is certified to dominate the others, is
+at most n times that summand; a sum of positive summands is at least any
+one of them.
+"""
+import math
+import random
+from dataclasses import dataclass
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+
+import sympy as sp
+from sympy.parsing.mathematica import parse_mathematica
+
+from shared import split_conditions, split_top_level
+
+__all__ = [
+    "to_sympy",
+    "to_wl",
+    "Facts",
+    "parse_facts",
+    "dominates",
+    "leading_summand",
+    "ReducedForm",
+    "reduced_form",
+    "DominantReduction",
+    "dominant_reduction",
+]
+
+# Larger expansions are not split into summands
+_MAX_SUMMANDS = 12
+_SAMPLES = 64
+
+
+def to_sympy(text: str) -> sp.Expr:
+    """Parse a Mathematica expression string into sympy."""
+    # Same head normalisation as attempt_proof
+    text = text.replace("exp[", "Exp[").replace("log[", "Log[")
+    expr = parse_mathematica(text)
+    return expr.subs(sp.Symbol("Infinity"), sp.oo)
+
+
+def to_wl(expr: sp.Expr) -> str:
+    """Render a sympy expression as Mathematica input."""
+    return sp.mathematica_code(expr)
+
+
+@dataclass
+class Facts:
+    """What the assumptions tell us, in the form the comparisons need.
+
+    - lower: best known constant lower bound for each symbol
+    - generators: pairs (k, e) meaning k * prod(s^e[s]) >= 1 on the region
+    """
+    lower: Dict[sp.Symbol, sp.Expr]
+    generators: List[Tuple[sp.Expr, Dict[sp.Symbol, sp.Expr]]]
+
+    def positive(self, s: sp.Symbol) -> bool:
+        return s in self.lower and bool(self.lower[s] >= 0)
+
+
+def _monomial(expr: sp.Expr) -> Optional[Tuple[sp.Expr, Dict[sp.Symbol, sp.Expr]]]:
+    """Split `c * prod(s^e)` into (c, {s: e}); None if `expr` is not of that form."""
+    coeff, rest = expr.as_coeff_Mul()
+    exps: Dict[sp.Symbol, sp.Expr] = {}
+    for f in sp.Mul.make_args(rest):
+        if f == 1:
+            continue
+        base, e = f.as_base_exp()
+        if not isinstance(base, sp.Symbol) or not e.is_Rational:
+            return None
+        exps[base] = exps.get(base, 0) + e
+    return coeff, exps
+
+
+def _relations(assumptions) -> List[sp.Basic]:
+    if isinstance(assumptions, str):
+        return [to_sympy(p) for p in split_conditions(assumptions)]
+    if isinstance(assumptions, sp.And):
+        return list(assumptions.args)
+    return list(assumptions)
+
+
+def parse_facts(assumptions) -> Facts:
+    """Collect bounds from `a > b`, `a >= b`, `a < b`, `a <= b` atoms.
+
+    `assumptions` is a Mathematica string ("h > 1 && d < h*m"), a sympy `And`,
+    or an iterable of sympy relations. Atoms that are not comparisons of
+    monomials are ignored, which only makes the comparisons more conservative.
+    So are comparisons of monomials in symbols not known to be positive:
+    big > small only gives big / small >= 1 when small > 0.
+    """
+    lower: Dict[sp.Symbol, sp.Expr] = {}
+    pairs: List[Tuple[sp.Expr, sp.Expr]] = []
+    for rel in _relations(assumptions):
+        if isinstance(rel, (sp.StrictGreaterThan, sp.GreaterThan)):
+            big, small = rel.lhs, rel.rhs
+        elif isinstance(rel, (sp.StrictLessThan, sp.LessThan)):
+            big, small = rel.rhs, rel.lhs
+        else:
+            continue
+        if not (big.is_finite is not False and small.is_finite is not False):
+            continue
+        if isinstance(big, sp.Symbol) and small.is_number and small.is_real:
+            if big not in lower or bool(small > lower[big]):
+                lower[big] = small
+        pairs.append((big, small))
+
+    facts = Facts(lower=lower, generators=[])
+    # A symbol above a positive monomial is positive too (d > h with h > 1)
+    changed = True
+    while changed:
+        changed = False
+        for big, small in pairs:
+            ms = _monomial(small)
+            if (isinstance(big, sp.Symbol) and not facts.positive(big) and ms is not None
+                    and bool(ms[0] > 0) and all(facts.positive(s) for s in ms[1])):
+                lower[big] = sp.Integer(0)
+                changed = True
+    for big, small in pairs:
+        if small.is_number and not bool(small > 0):
+            continue
+        mb, ms = _monomial(big), _monomial(small)
+        if mb is None or ms is None or not bool(mb[0] > 0) or not bool(ms[0] > 0):
+            continue
+        if not all(facts.positive(s) for s in list(mb[1]) + list(ms[1])):
+            continue
+        exps = dict(mb[1])
+        for s, e in ms[1].items():
+            exps[s] = exps.get(s, 0) - e
+        exps = {s: e for s, e in exps.items() if e != 0}
+        if exps:
+            facts.generators.append((mb[0] / ms[0], exps))
+    return facts
+
+
+@dataclass
+class _Split:
+    coeff: sp.Expr
+    powers: Dict[sp.Symbol, sp.Expr]
+    exp_arg: sp.Expr
+    other: Dict[sp.Expr, sp.Expr]
+
+
+def _split(term: sp.Expr) -> _Split:
+    coeff, rest = term.as_coeff_Mul()
+    powers: Dict[sp.Symbol, sp.Expr] = {}
+    other: Dict[sp.Expr, sp.Expr] = {}
+    exp_arg: sp.Expr = sp.Integer(0)
+    for f in sp.Mul.make_args(rest):
+        if f == 1:
+            continue
+        if isinstance(f, sp.exp):
+            exp_arg += f.args[0]
+            continue
+        base, e = f.as_base_exp()
+        if isinstance(base, sp.Symbol) and e.is_Rational:
+            powers[base] = powers.get(base, 0) + e
+        else:
+            other[base] = other.get(base, 0) + e
+    return _Split(coeff, powers, sp.expand(exp_arg), other)
+
+
+def _positive(sp_term: _Split, facts: Facts) -> bool:
+    if not bool(sp_term.coeff > 0):
+        return False
+    if not all(facts.positive(s) for s in sp_term.powers):
+        return False
+    for base in sp_term.other:
+        # Log[s] is non-negative once s >= 1; anything else is out of scope
+        if not (isinstance(base, sp.log) and isinstance(base.args[0], sp.Symbol)):
+            return False
+        s = base.args[0]
+        if s not in facts.lower or not bool(facts.lower[s] >= 1):
+            return False
+    return True
+
+
+def _in_cone(v: Dict[sp.Symbol, sp.Expr], c: sp.Expr, facts: Facts) -> bool:
+    """True if c * prod(s^v[s]) >= 1 follows from the generators."""
+    gens = facts.generators
+    syms = sorted(set(v) | {s for _, g in gens for s in g}, key=str)
+    target = sp.Matrix([v.get(s, 0) for s in syms])
+    cols = [sp.Matrix([g.get(s, 0) for s in syms]) for _, g in gens]
+    # Caratheodory: a point of the cone is a non-negative combination of a
+    # linearly independent subset of the generators
+    for size in range(1, min(len(cols), len(syms)) + 1):
+        for idx in combinations(range(len(cols)), size):
+            M = sp.Matrix.hstack(*[cols[i] for i in idx])
+            if M.rank() != size:
+                continue
+            lam = (M.T * M).solve(M.T * target)
+            if M * lam != target or any(bool(l < 0) for l in lam):
+                continue
+            # prod(s^v) = prod_i (prod(s^e_i))^l_i >= prod_i k_i^-l_i
+            bound = c
+            for l, i in zip(lam, idx):
+                bound *= gens[i][0] ** (-l)
+            if bool(bound >= 1):
+                return True
+    return False
+
+
+def dominates(t: sp.Expr, s: sp.Expr, facts: Facts) -> Optional[bool]:
+    """Decide whether t >= s everywhere on the region described by `facts`.
+
+    Returns True when certified, False when s > t is certified (only detected
+    for identical monomials with a larger coefficient), None when undecided.
+    """
+    a, b = _split(t), _split(s)
+    if not (_positive(a, facts) and _positive(b, facts)):
+        return None
+    if a.other != b.other:
+        return None
+    # exp(u)/exp(w) >= exp(const) when u - w is a polynomial with
+    # non-negative coefficients in non-negative symbols
+    diff = sp.expand(a.exp_arg - b.exp_arg)
+    c0 = diff.as_coeff_Add()[0]
+    diff = diff - c0
+    if diff != 0:
+        gens = sorted(diff.free_symbols, key=str)
+        if not all(facts.positive(g) for g in gens):
+            return None
+        try:
+            poly = sp.Poly(diff, *gens)
+        except sp.PolynomialError:
+            return None
+        if any(bool(co < 0) for co in poly.coeffs()):
+            return None
+    c = a.coeff / b.coeff * sp.exp(c0)
+    v = dict(a.powers)
+    for sym, e in b.powers.items():
+        v[sym] = v.get(sym, 0) - e
+    v = {sym: e for sym, e in v.items() if e != 0}
+    if not v:
+        if bool(c >= 1):
+            return True
+        return False if diff == 0 else None
+    return True if _in_cone(v, c, facts) else None
+
+
+def leading_summand(expr: sp.Expr, facts: Facts) -> Optional[sp.Expr]:
+    """The summand of `expr` that is >= every other summand, if it can be certified."""
+    terms = [t for t in sp.Add.make_args(sp.expand(expr)) if t != 0]
+    if not terms:
+        return sp.Integer(0)
+    if len(terms) == 1:
+        return terms[0]
+    for t in terms:
+        if all(dominates(t, s, facts) is True for s in terms if s is not t):
+            return t
+    return None
+
+
+@dataclass
+class ReducedForm:
+    """Result of `reduced_form`.
+
+    - wl: Mathematica text; undecided factors appear as LeadingSummand[...]
+    - decided / undecided: number of sum factors handled in Python / left to the CAS
+    """
+    wl: str
+    decided: int
+    undecided: int
+
+
+def reduced_form(expr, assumptions: str) -> ReducedForm:
+    """Python counterpart of the prelude's `reducedForm[expr, assum]`.
+
+    Every sum factor of the numerator and denominator is replaced by its
+    leading summand, as the prelude does; numeric factors are dropped. Since
+    the summands are positive, a sum is within a constant factor of its
+    largest term, so the result is comparable to `expr` on the region.
+    """
+    if isinstance(expr, str):
+        expr = to_sympy(expr)
+    facts = parse_facts(assumptions)
+    num, den = sp.fraction(sp.together(expr))
+    decided = undecided = 0
+
+    def side(part: sp.Expr) -> str:
+        nonlocal decided, undecided
+        factors: List[str] = []
+        for f in sp.Mul.make_args(part):
+            if f.is_number:
+                continue
+            base, e = f.as_base_exp()
+            if not isinstance(sp.expand(base), sp.Add):
+                factors.append(f"({to_wl(f)})")
+                continue
+            lead = leading_summand(base, facts)
+            if lead is None:
+                undecided += 1
+                wl_base = f"LeadingSummand[{to_wl(sp.expand(base))}, {assumptions}]"
+            else:
+                decided += 1
+                wl_base = f"({to_wl(lead)})"
+            factors.append(wl_base if e == 1 else f"{wl_base}^({to_wl(e)})")
+        return "*".join(factors) or "1"
+
+    wl = f"({side(num)})/({side(den)})"
+    return ReducedForm(wl=wl, decided=decided, undecided=undecided)
+
+
+@dataclass
+class DominantReduction:
+    """Smaller sides for `lhs <= C*rhs` on a region, from `dominant_reduction`.
+
+    - lhs: an upper bound of the original lhs on the region (n*(lead))
+    - rhs: a lower bound of the original rhs on the region (one summand)
+    - steps: why each bound holds, for certificates
+    """
+    lhs: str
+    rhs: str
+    steps: List[str]
+
+    def describe(self) -> str:
+        return "; ".join(self.steps)
+
+
+def _summands(expr: sp.Expr) -> List[sp.Expr]:
+    terms = [t for t in sp.Add.make_args(sp.expand(expr)) if t != 0]
+    return terms if 1 < len(terms) <= _MAX_SUMMANDS else [expr]
+
+
+def _largest_on_samples(variables: str, conds: str, terms: List[sp.Expr]) -> Optional[sp.Expr]:
+    """The summand that is most often the largest at random points of the region."""
+    # Lazy: portfolio itself depends on this module
+    from portfolio import numeric_test
+
+    names = [v.strip() for v in split_top_level(variables.strip().strip("{}")) if v.strip()]
+    symbols = [sp.Symbol(n) for n in names]
+    atoms = split_conditions(conds)
+    try:
+        in_region = numeric_test(atoms, symbols)
+        fs = [sp.lambdify(symbols, t, "math") for t in terms]
+    except Exception:
+        return None
+    rng = random.Random(0)
+    wins = [0] * len(terms)
+    found = 0
+    for _ in range(_SAMPLES * 20):
+        if found == _SAMPLES:
+            break
+        point = [math.exp(rng.uniform(-4, 4)) * (-1 if rng.random() < 0.2 else 1) for _ in names]
+        if not in_region(point):
+            continue
+        try:
+            values = [f(*point) for f in fs]
+        except (ArithmeticError, ValueError, TypeError, OverflowError):
+            continue
+        if not all(isinstance(v, float) or isinstance(v, int) for v in values):
+            continue
+        found += 1
+        wins[max(range(len(values)), key=values.__getitem__)] += 1
+    if not found:
+        return None
+    return terms[max(range(len(terms)), key=wins.__getitem__)]
+
+
+def dominant_reduction(variables: str, conds: str, lhs: str, rhs: str) -> Optional[DominantReduction]:
+    """Replace each side of `lhs <= C*rhs` by its dominant terms on the region `conds`.
+
+    The lhs becomes n*(lead) when `lead` is certified to dominate every
+    other summand, and the rhs becomes one of its summands when all of them
+    are certified positive. Callers still have the CAS prove the two steps
+    (lhs <= n*lead, kept <= rhs) along with the reduced inequality, so the
+    certificate does not rest on this module. The rhs summand kept is the
+    certified leading one if there is one, else the one that is largest most
+    often at sample points. None if neither side can be reduced.
+    """
+    try:
+        facts = parse_facts(conds)
+        left = _summands(to_sympy(lhs))
+        right = _summands(to_sympy(rhs))
+    except Exception:
+        return None
+    steps: List[str] = []
+    new_lhs, new_rhs = lhs, rhs
+    if len(left) > 1:
+        lead = leading_summand(sp.Add(*left), facts)
+        if lead is not None:
+            new_lhs = f"{len(left)}*({to_wl(lead)})"
+            steps.append(f"lhs <= {new_lhs}, as {to_wl(lead)} dominates every summand")
+    if len(right) > 1 and all(_positive(_split(t), facts) for t in right):
+        kept = leading_summand(sp.Add(*right), facts)
+        if kept is None:
+            kept = _largest_on_samples(variables, conds, right)
+        if kept is not None:
+            new_rhs = to_wl(kept)
+            steps.append(f"rhs >= {new_rhs}, as every summand is positive")
+    if not steps:
+        return None
+    return DominantReduction(lhs=new_lhs, rhs=new_rhs, steps=steps)
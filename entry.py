@@ -1,6 +1,6 @@
 from sympy import sympify, Le, Ge, Lt, Gt, Eq, Symbol, summation, symbols, oo
 import re
-from collections import defaultdict
+from collections import defaultdict, deque
 from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, DefaultDict
 from dataclasses import dataclass
 from axioms import transitivity, le_to_bigo, ge_to_bigo, lt_to_bigo, gt_to_bigo
@@ -29,8 +29,9 @@ axioms = { "Transitivity" : transitivity,
     
 }
 
-given = ["BigO(m,n)", "BigO(n,p)"]
-goal = "?BigO(m,p)"
+# Axioms that combine two facts a, b with a.rhs == b.lhs (chains). Every other
+# axiom maps a single fact to a single fact.
+chain_axioms = {"Transitivity"}
 
 #Let us now create a function that can create terms out of given
 def _parse_given(given):
@@ -52,27 +53,113 @@ def _parse_conditions(conditions: List[str]):
 # We also need a way to check if two Terms are the same
 
 def _eq(a: Term, b: Term):
-    if a.rel == b.rel:
-        if a.lhs == b.lhs:
-            if a.rhs == b.rhs:
-                return True
-    return False
+    # Terms are interned, so this is an identity check
+    return a is b
     
 
-# We now parse the given and the goal. We create Terms out of them. 
-given = _parse_given(given)
-goal = _parse_goal(goal)
+class FactBase:
+    """Forward-chaining closure of a set of facts under `axioms`.
 
-#Alright. So we are on the right track. Let us now try to do this without an LLM. 
-#We want to make sure that we can carry out the proof of the AM-GM thing. 
-#Let's do it for two functions. (a+b)/2 \geq C* \sqrt{a*b}
+    Facts are indexed by (rel, lhs) and (rel, rhs), so a new fact is only
+    joined against the facts it can actually chain with. `add` derives
+    everything eagerly (semi-naive: each fact is processed once), after which
+    `derives` is a set lookup. `explain` replays how a fact was obtained.
+    """
 
-a = Term(rel = "BigO", lhs = "(a*b)^(1/2)", rhs = "(a+b)/2")
-print(a.rhs)
+    def __init__(self, rules: Optional[Dict[str, Any]] = None):
+        self.rules = axioms if rules is None else rules
+        self.facts: Set[Term] = set()
+        self.by_lhs: DefaultDict[Tuple[str, Any], Set[Term]] = defaultdict(set)
+        self.by_rhs: DefaultDict[Tuple[str, Any], Set[Term]] = defaultdict(set)
+        # fact -> (rule name or source, premises)
+        self.reasons: Dict[Term, Tuple[str, Tuple[Term, ...]]] = {}
 
-#so what do we need? we need to divide the domain, and then check that this is true. 
+    def __contains__(self, term: Term) -> bool:
+        return term in self.facts
 
+    def __len__(self) -> int:
+        return len(self.facts)
 
-for c in range(-2,2):
-    print(c)
+    def _insert(self, term: Term, reason: str, premises: Tuple[Term, ...]) -> bool:
+        if term is None or term in self.facts:
+            return False
+        self.facts.add(term)
+        self.by_lhs[(term.rel, term.lhs)].add(term)
+        self.by_rhs[(term.rel, term.rhs)].add(term)
+        self.reasons[term] = (reason, premises)
+        return True
 
+    def add(self, term: Term, reason: str = "given") -> None:
+        if not self._insert(term, reason, ()):
+            return
+        agenda = deque([term])
+        while agenda:
+            f = agenda.popleft()
+            for name, rule in self.rules.items():
+                if name in chain_axioms:
+                    # f as the left link, then f as the right link
+                    pairs = [(f, g) for g in list(self.by_lhs[(f.rel, f.rhs)])]
+                    pairs += [(g, f) for g in list(self.by_rhs[(f.rel, f.lhs)])]
+                    for a, b in pairs:
+                        new = rule([a, b])
+                        if new is not None and self._insert(new, name, (a, b)):
+                            agenda.append(new)
+                else:
+                    new = rule(f)
+                    if new is not None and self._insert(new, name, (f,)):
+                        agenda.append(new)
+
+    def update(self, terms: Iterable[Term], reason: str = "given") -> None:
+        for t in terms:
+            self.add(t, reason)
+
+    def derives(self, goal: Term) -> bool:
+        return goal in self.facts
+
+    def explain(self, goal: Term) -> List[str]:
+        """Derivation of `goal` as lines "fact  [rule: premises]", premises first."""
+        lines: List[str] = []
+        seen: Set[Term] = set()
+
+        def walk(t: Term) -> None:
+            if t in seen:
+                return
+            seen.add(t)
+            reason, premises = self.reasons[t]
+            for p in premises:
+                walk(p)
+            used = ", ".join(str(p) for p in premises)
+            lines.append(f"{t}  [{reason}{': ' + used if used else ''}]")
+
+        if goal in self.facts:
+            walk(goal)
+        return lines
+
+
+def solve(problem: Problem) -> Optional[List[str]]:
+    """Derive `problem.goal` from `problem.given`; the derivation, or None."""
+    base = FactBase()
+    base.update(_parse_given(problem.given))
+    goal = _parse_goal(problem.goal)
+    return base.explain(goal) if base.derives(goal) else None
+
+
+if __name__ == "__main__":
+    given = ["BigO(m,n)", "BigO(n,p)"]
+    goal = "?BigO(m,p)"
+
+    # We now parse the given and the goal. We create Terms out of them. 
+    print(solve(Problem(conditions=[], given=given, goal=goal)))
+
+    #Alright. So we are on the right track. Let us now try to do this without an LLM. 
+    #We want to make sure that we can carry out the proof of the AM-GM thing. 
+    #Let's do it for two functions. (a+b)/2 \geq C* \sqrt{a*b}
+
+    a = Term(rel = "BigO", lhs = "(a*b)^(1/2)", rhs = "(a+b)/2")
+    print(a.rhs)
+
+    #so what do we need? we need to divide the domain, and then check that this is true. 
+
+
+    for c in range(-2,2):
+        print(c)
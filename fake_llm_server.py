@@ -0,0 +1,205 @@
+"""Local stand-in for the Gemini REST API, for exercising `llm_client` offline.
+
+It answers generateContent and streamGenerateContent (SSE) with canned
+replies and can misbehave on purpose: throttle (429 with Retry-After), fail
+(503), add latency, or stall a stream halfway.
+
+    python fake_llm_server.py --port 8765 --reply "[x<=1, x>1]" --throttle 0.3 --latency 0.2
+    DECOMP_LLM_BASE_URL=http://127.0.0.1:8765 GEMINI_API_KEY=fake decomp prove question_1
+
+`serve(...)` starts the same server on a background thread and returns it.
+"""
+import argparse
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+__all__ = ["FakeLLMServer", "serve"]
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        port: int = 0,
+        *,
+        replies: Optional[List[str]] = None,
+        throttle: float = 0.0,
+        errors: float = 0.0,
+        latency: float = 0.0,
+        stall: float = 0.0,
+        stall_seconds: float = 30.0,
+        rpm: float = 0.0,
+        retry_after: float = 1.0,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.replies = itertools.cycle(replies or ["[True]"])
+        self.throttle = throttle
+        self.errors = errors
+        self.latency = latency
+        self.stall = stall
+        self.stall_seconds = stall_seconds
+        self.rpm = rpm
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.window: List[float] = []
+        # Counts of what was served, for assertions in ad-hoc checks
+        self.stats = {"requests": 0, "ok": 0, "throttled": 0, "errors": 0, "stalled": 0}
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def decide(self) -> str:
+        """'ok', 'throttle', 'error' or 'stall' for the next request."""
+        with self.lock:
+            self.stats["requests"] += 1
+            now = time.monotonic()
+            self.window = [t for t in self.window if now - t < 60]
+            if self.rpm and len(self.window) >= self.rpm:
+                outcome = "throttle"
+            else:
+                r = self.rng.random()
+                if r < self.throttle:
+                    outcome = "throttle"
+                elif r < self.throttle + self.errors:
+                    outcome = "error"
+                elif r < self.throttle + self.errors + self.stall:
+                    outcome = "stall"
+                else:
+                    outcome = "ok"
+            if outcome in ("ok", "stall"):
+                self.window.append(now)
+            self.stats[{"ok": "ok", "throttle": "throttled", "error": "errors", "stall": "stalled"}[outcome]] += 1
+            return outcome
+
+    def next_reply(self) -> str:
+        with self.lock:
+            return next(self.replies)
+
+
+def _response(text: str, prompt_tokens: int) -> dict:
+    return {
+        "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+        "usageMetadata": {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": max(1, len(text) // 4),
+            "totalTokenCount": prompt_tokens + max(1, len(text) // 4),
+        },
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeLLMServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _json(self, code: int, body: dict, headers: Optional[dict] = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, code: int, status: str, headers: Optional[dict] = None) -> None:
+        self._json(code, {"error": {"code": code, "message": f"fake {status}", "status": status}}, headers)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        path = self.path.split("?", 1)[0]
+        m = re.search(r"/models/[^/:]+:(generateContent|streamGenerateContent)$", path)
+        if not m:
+            self._error(404, "NOT_FOUND")
+            return
+
+        srv = self.server
+        time.sleep(srv.latency * (0.5 + srv.rng.random()))
+        outcome = srv.decide()
+        if outcome == "throttle":
+            self._error(429, "RESOURCE_EXHAUSTED", {"Retry-After": f"{srv.retry_after:g}"})
+            return
+        if outcome == "error":
+            self._error(503, "UNAVAILABLE")
+            return
+
+        text = srv.next_reply()
+        prompt_tokens = max(1, len(body) // 4)
+        if m.group(1) == "generateContent":
+            if outcome == "stall":
+                time.sleep(srv.stall_seconds)
+            self._json(200, _response(text, prompt_tokens))
+            return
+
+        # Server-sent events, two chunks; a stall hangs between them
+        half = len(text) // 2
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            for i, part in enumerate((text[:half], text[half:])):
+                if i == 1 and outcome == "stall":
+                    time.sleep(srv.stall_seconds)
+                chunk = _response(part, prompt_tokens)
+                if i == 0:
+                    del chunk["usageMetadata"]
+                self.wfile.write(f"data: {json.dumps(chunk)}\r\n\r\n".encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self.close_connection = True
+
+
+def serve(port: int = 0, **options) -> FakeLLMServer:
+    """Start a `FakeLLMServer` on a daemon thread; call `.shutdown()` to stop it."""
+    server = FakeLLMServer(port, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake Gemini endpoint with injected throttling and latency")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--reply", action="append", help="Canned reply (repeat to cycle through several)")
+    parser.add_argument("--throttle", type=float, default=0.0, help="Probability of a 429 response")
+    parser.add_argument("--errors", type=float, default=0.0, help="Probability of a 503 response")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mean added latency in seconds")
+    parser.add_argument("--stall", type=float, default=0.0, help="Probability that a response stalls")
+    parser.add_argument("--stall-seconds", type=float, default=30.0)
+    parser.add_argument("--rpm", type=float, default=0.0, help="Requests per minute before answering 429 (0: no limit)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After sent with 429 responses")
+    args = parser.parse_args()
+    server = FakeLLMServer(
+        args.port,
+        replies=args.reply,
+        throttle=args.throttle,
+        errors=args.errors,
+        latency=args.latency,
+        stall=args.stall,
+        stall_seconds=args.stall_seconds,
+        rpm=args.rpm,
+        retry_after=args.retry_after,
+    )
+    print(f"Fake LLM endpoint on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
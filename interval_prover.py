@@ -0,0 +1,339 @@
+"""Local branch-and-bound prover for lhs <= C*rhs on bounded regions.
+
+Many regions proposed by the LLM are boxes (or boxes cut by a few extra
+inequalities) on which the estimate holds with room to spare. Such goals
+can be certified without Mathematica: the region is covered by boxes, lhs
+and rhs are enclosed with interval arithmetic, and a box is closed once
+sup(lhs) <= inf(C*rhs). Boxes that are certainly outside the region are
+dropped, the others are split along their widest side.
+
+Intervals are pairs of floats rounded outward by one ulp after every
+arithmetic operation (a few ulps for exp/log/pow, whose libm results are
+not correctly rounded), so a closed box is a proof, not a sample. Boxes are
+evaluated in batches: the expression tree is walked once per batch.
+
+Only regions whose variables get finite bounds from the conditions are
+attempted; anything else, or a goal that is not closed within the time
+budget, is left to `Resolve`.
+"""
+import math
+import os
+import time
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Callable, Dict, List, Optional, Tuple
+
+import sympy as sp
+
+from dominance import to_sympy
+from shared import split_conditions, split_top_level
+
+__all__ = ["Interval", "IntervalProof", "compile_expr", "interval_budget", "prove"]
+
+_INF = math.inf
+# Boxes evaluated per walk of the expression tree
+_BATCH = 256
+# Boxes narrower than this in every direction are not split further
+_MIN_WIDTH = 1e-9
+_MAX_BOXES = 200_000
+
+
+def _down(x: float, ulps: int = 1) -> float:
+    for _ in range(ulps):
+        x = math.nextafter(x, -_INF)
+    return x
+
+
+def _up(x: float, ulps: int = 1) -> float:
+    for _ in range(ulps):
+        x = math.nextafter(x, _INF)
+    return x
+
+
+class Interval(tuple):
+    """Closed interval [lo, hi] of floats; lo may be -inf and hi +inf."""
+
+    __slots__ = ()
+
+    def __new__(cls, lo: float, hi: float):
+        if math.isnan(lo) or math.isnan(hi):
+            lo, hi = -_INF, _INF
+        return tuple.__new__(cls, (lo, hi))
+
+    @property
+    def lo(self) -> float:
+        return self[0]
+
+    @property
+    def hi(self) -> float:
+        return self[1]
+
+    @classmethod
+    def point(cls, q) -> "Interval":
+        """Smallest float interval containing the rational (or float) q."""
+        f = float(q)
+        if Fraction(f) == Fraction(q):
+            return cls(f, f)
+        return cls(_down(f), _up(f))
+
+    def __add__(self, other: "Interval") -> "Interval":
+        return Interval(_down(self.lo + other.lo), _up(self.hi + other.hi))
+
+    def __neg__(self) -> "Interval":
+        return Interval(-self.hi, -self.lo)
+
+    def __sub__(self, other: "Interval") -> "Interval":
+        return self + (-other)
+
+    def __mul__(self, other: "Interval") -> "Interval":
+        # 0 * inf counts as 0, as in extended interval arithmetic
+        ps = [0.0 if math.isnan(p) else p for p in
+              (self.lo * other.lo, self.lo * other.hi, self.hi * other.lo, self.hi * other.hi)]
+        return Interval(_down(min(ps)), _up(max(ps)))
+
+    def inverse(self) -> "Interval":
+        if self.lo <= 0 <= self.hi:
+            return Interval(-_INF, _INF)
+        return Interval(_down(1 / self.hi), _up(1 / self.lo))
+
+    def __truediv__(self, other: "Interval") -> "Interval":
+        return self * other.inverse()
+
+    def __pow__(self, n: int) -> "Interval":
+        if n == 0:
+            return Interval(1.0, 1.0)
+        if n < 0:
+            return (self ** -n).inverse()
+        lo, hi = self.lo, self.hi
+        a, b = _ipow(lo, n), _ipow(hi, n)
+        if n % 2 == 0 and lo <= 0 <= hi:
+            return Interval(0.0, _up(max(a, b), n))
+        if n % 2 == 0 and hi < 0:
+            a, b = b, a
+        return Interval(_down(a, n), _up(b, n))
+
+
+def _ipow(x: float, n: int) -> float:
+    try:
+        return x ** n
+    except OverflowError:
+        return _INF if x > 0 or n % 2 == 0 else -_INF
+
+
+def _monotone(f: Callable[[float], float], x: Interval, ulps: int = 4) -> Interval:
+    def safe(v: float, big: float) -> float:
+        try:
+            return f(v)
+        except OverflowError:
+            return big
+    return Interval(_down(safe(x.lo, _INF), ulps), _up(safe(x.hi, _INF), ulps))
+
+
+def _exp(x: Interval) -> Interval:
+    r = _monotone(lambda v: 0.0 if v == -_INF else (_INF if v == _INF else math.exp(v)), x)
+    return Interval(max(0.0, r.lo), r.hi)
+
+
+def _log(x: Interval) -> Interval:
+    if x.lo <= 0:
+        return Interval(-_INF, _INF)
+    return _monotone(lambda v: _INF if v == _INF else math.log(v), x)
+
+
+def _rpow(x: Interval, e: float) -> Interval:
+    """x^e for a non-integer exponent; needs x >= 0."""
+    if x.lo < 0:
+        return Interval(-_INF, _INF)
+
+    def f(v: float) -> Tuple[float, int]:
+        if v == 0:
+            return (0.0 if e > 0 else _INF), 0
+        if v == _INF:
+            return (_INF if e > 0 else 0.0), 0
+        # The rounding error of `e` itself is amplified by |log v|
+        return math.pow(v, e), 4 + math.ceil(abs(math.log(v)))
+
+    (a, ua), (b, ub) = f(x.lo), f(x.hi)
+    if e < 0:
+        (a, ua), (b, ub) = (b, ub), (a, ua)
+    return Interval(max(0.0, _down(a, ua)), _up(b, ub))
+
+
+Batch = List[Interval]
+Compiled = Callable[[List[List[Interval]]], Batch]
+
+
+def compile_expr(expr: sp.Expr, names: List[str]) -> Optional[Compiled]:
+    """Batch interval evaluator of `expr` over boxes indexed like `names`; None if unsupported."""
+    index = {n: i for i, n in enumerate(names)}
+
+    def build(e: sp.Expr) -> Optional[Compiled]:
+        if e.is_Symbol:
+            if e.name not in index:
+                return None
+            i = index[e.name]
+            return lambda boxes: [b[i] for b in boxes]
+        if e.is_Rational:
+            iv = Interval.point(Fraction(int(e.p), int(e.q)))
+            return lambda boxes: [iv] * len(boxes)
+        if e.is_Number and e.is_finite:
+            f = float(e)
+            iv = Interval(_down(f, 2), _up(f, 2))
+            return lambda boxes: [iv] * len(boxes)
+        if e == sp.E:
+            iv = Interval(_down(math.e, 2), _up(math.e, 2))
+            return lambda boxes: [iv] * len(boxes)
+        if e == sp.pi:
+            iv = Interval(_down(math.pi, 2), _up(math.pi, 2))
+            return lambda boxes: [iv] * len(boxes)
+        args = [build(a) for a in e.args]
+        if any(a is None for a in args):
+            return None
+        if isinstance(e, sp.Add):
+            def add(boxes):
+                out = args[0](boxes)
+                for a in args[1:]:
+                    out = [x + y for x, y in zip(out, a(boxes))]
+                return out
+            return add
+        if isinstance(e, sp.Mul):
+            def mul(boxes):
+                out = args[0](boxes)
+                for a in args[1:]:
+                    out = [x * y for x, y in zip(out, a(boxes))]
+                return out
+            return mul
+        if isinstance(e, sp.Pow):
+            base, ex = args
+            if e.exp.is_Integer:
+                n = int(e.exp)
+                return lambda boxes: [x ** n for x in base(boxes)]
+            if e.exp.is_Rational:
+                p, q = int(e.exp.p), int(e.exp.q)
+                # Only non-negative bases; anything else encloses to (-inf, inf)
+                return lambda boxes: [_rpow(x ** p, 1 / q) for x in base(boxes)]
+            return lambda boxes: [_exp(y * _log(x)) for x, y in zip(base(boxes), ex(boxes))]
+        if isinstance(e, sp.exp):
+            return lambda boxes: [_exp(x) for x in args[0](boxes)]
+        if isinstance(e, sp.log) and len(e.args) == 1:
+            return lambda boxes: [_log(x) for x in args[0](boxes)]
+        return None
+
+    return build(expr)
+
+
+def interval_budget() -> float:
+    """Seconds per region: $DECOMP_INTERVAL_BUDGET (0 disables the prover), default 2."""
+    try:
+        return float(os.environ.get("DECOMP_INTERVAL_BUDGET", "2"))
+    except ValueError:
+        return 2.0
+
+
+@dataclass
+class IntervalProof:
+    proved: bool
+    boxes: int = 0
+    reason: str = ""
+
+
+def _names(text: str) -> List[str]:
+    text = text.strip()
+    if text.startswith("{") and text.endswith("}"):
+        text = text[1:-1]
+    return [v.strip() for v in split_top_level(text) if v.strip()]
+
+
+# Each constraint g <= 0 (strict or not) on the region
+Constraint = Tuple[Compiled, bool]
+
+
+def _constraints(atoms: List[str], names: List[str]):
+    """(bounds, constraints) of the region, or None if some condition is unsupported."""
+    bounds: Dict[str, List[float]] = {n: [-_INF, _INF] for n in names}
+    constraints: List[Constraint] = []
+    for atom in atoms:
+        rel = to_sympy(atom)
+        if rel is sp.true:
+            continue
+        if isinstance(rel, (sp.StrictLessThan, sp.LessThan)):
+            small, big = rel.lhs, rel.rhs
+        elif isinstance(rel, (sp.StrictGreaterThan, sp.GreaterThan)):
+            small, big = rel.rhs, rel.lhs
+        else:
+            return None
+        strict = isinstance(rel, (sp.StrictLessThan, sp.StrictGreaterThan))
+        # Constant bounds on a single variable become the box itself
+        if small.is_Symbol and small.name in bounds and big.is_number and big.is_finite:
+            bounds[small.name][1] = min(bounds[small.name][1], _up(float(big), 2))
+            continue
+        if big.is_Symbol and big.name in bounds and small.is_number and small.is_finite:
+            bounds[big.name][0] = max(bounds[big.name][0], _down(float(small), 2))
+            continue
+        g = compile_expr(small - big, names)
+        if g is None:
+            return None
+        constraints.append((g, strict))
+    return bounds, constraints
+
+
+def prove(
+    variables: str,
+    conds: str,
+    lhs: str,
+    rhs: str,
+    c: int = 0,
+    *,
+    budget: Optional[float] = None,
+) -> IntervalProof:
+    """Try to certify lhs <= 10^c * rhs on the region `conds` within `budget` seconds."""
+    budget = interval_budget() if budget is None else budget
+    if budget <= 0:
+        return IntervalProof(False, reason="disabled")
+    names = _names(variables)
+    atoms = split_conditions(conds)
+    if any("||" in a or "!" in a or "==" in a for a in atoms):
+        return IntervalProof(False, reason="unsupported conditions")
+    try:
+        region = _constraints(atoms, names)
+        lhs_f = compile_expr(to_sympy(lhs), names)
+        rhs_f = compile_expr(sp.Integer(10) ** c * to_sympy(rhs), names)
+    except Exception as e:
+        return IntervalProof(False, reason=f"could not parse: {e}")
+    if region is None or lhs_f is None or rhs_f is None:
+        return IntervalProof(False, reason="unsupported expression")
+    bounds, constraints = region
+    if any(not (math.isfinite(lo) and math.isfinite(hi)) for lo, hi in bounds.values()):
+        return IntervalProof(False, reason="unbounded region")
+
+    deadline = time.monotonic() + budget
+    pending: List[List[Interval]] = [[Interval(*bounds[n]) for n in names]]
+    processed = 0
+    while pending:
+        if time.monotonic() > deadline:
+            return IntervalProof(False, processed, "time budget exhausted")
+        if processed + len(pending) > _MAX_BOXES:
+            return IntervalProof(False, processed, "too many boxes")
+        batch, pending = pending[-_BATCH:], pending[:-_BATCH]
+        processed += len(batch)
+
+        outside = [False] * len(batch)
+        for g, strict in constraints:
+            for i, v in enumerate(g(batch)):
+                # g <= 0 (or < 0) is violated on the whole box
+                if v.lo > 0 or (strict and v.lo >= 0):
+                    outside[i] = True
+        ls, rs = lhs_f(batch), rhs_f(batch)
+        for box, out, l, r in zip(batch, outside, ls, rs):
+            if out or l.hi <= r.lo:
+                continue
+            widths = [iv.hi - iv.lo for iv in box]
+            k = max(range(len(box)), key=lambda j: widths[j])
+            if widths[k] < _MIN_WIDTH:
+                return IntervalProof(False, processed, "could not close a minimal box")
+            mid = box[k].lo + widths[k] / 2
+            left, right = list(box), list(box)
+            left[k] = Interval(box[k].lo, mid)
+            right[k] = Interval(mid, box[k].hi)
+            pending.extend([left, right])
+    return IntervalProof(True, processed)
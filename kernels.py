@@ -0,0 +1,206 @@
+"""Run independent Wolfram Language jobs in parallel wolframscript kernels.
+
+Symbolic Integrate/Reduce/Resolve calls can grow to many GB, so kernels are
+admitted under a host memory budget rather than just a count:
+
+- every kernel gets a cap of budget / concurrency, enforced inside the
+  kernel with MemoryConstrained and outside by watching the RSS of its
+  process group;
+- a new job is only started while the RSS of the running kernels plus one
+  more cap fits in the budget and the host still has that much available;
+- a job that runs out of memory is requeued and the concurrency is halved,
+  which doubles the cap of every later kernel. At concurrency 1 the job is
+  reported as MemoryLimitExceeded.
+
+Each job runs in its own process group so that it can be cancelled: once a
+result satisfies `stop`, pending jobs are dropped and running kernels are
+killed.
+"""
+import os
+import re
+import signal
+import subprocess
+import tempfile
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+try:
+    import psutil  # type: ignore
+except ImportError:
+    psutil = None
+
+__all__ = ["MEMORY_EXCEEDED", "available_memory", "memory_budget", "KernelScheduler", "run_parallel"]
+
+MEMORY_EXCEEDED = "MemoryLimitExceeded"
+# RSS allowed above the MemoryConstrained cap (kernel baseline, front end)
+_RSS_SLACK = 1.25
+
+
+def _parse_size(text: str) -> int:
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*", text, flags=re.I)
+    if not m:
+        raise ValueError(f"Invalid memory size: {text!r}")
+    scale = {"": 1, "K": 2**10, "M": 2**20, "G": 2**30, "T": 2**40}[m.group(2).upper()]
+    return int(float(m.group(1)) * scale)
+
+
+def available_memory() -> int:
+    """Bytes the host can still hand out without swapping."""
+    if psutil is not None:
+        return int(psutil.virtual_memory().available)
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+
+
+def memory_budget() -> int:
+    """Budget for all kernels: $DECOMP_MEMORY_BUDGET (e.g. "16G") or 80% of available memory."""
+    env = os.environ.get("DECOMP_MEMORY_BUDGET")
+    if env:
+        return _parse_size(env)
+    return int(available_memory() * 0.8)
+
+
+def _rss_by_group() -> Dict[int, int]:
+    """Total RSS per process group, so a wolframscript and its kernel count together."""
+    totals: Dict[int, int] = {}
+    if psutil is not None:
+        for p in psutil.process_iter(["pid"]):
+            try:
+                pgid = os.getpgid(p.info["pid"])
+                totals[pgid] = totals.get(pgid, 0) + p.memory_info().rss
+            except (OSError, psutil.Error):
+                continue
+        return totals
+    if not os.path.isdir("/proc"):
+        return totals
+    page = os.sysconf("SC_PAGE_SIZE")
+    for pid in os.listdir("/proc"):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f"/proc/{pid}/stat", "r") as f:
+                pgid = int(f.read().rsplit(")", 1)[1].split()[2])
+            with open(f"/proc/{pid}/statm", "r") as f:
+                totals[pgid] = totals.get(pgid, 0) + int(f.read().split()[1]) * page
+        except (OSError, IndexError, ValueError):
+            continue
+    return totals
+
+
+def _kill(proc: subprocess.Popen) -> None:
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+class KernelScheduler:
+    """Admission-controlled pool of wolframscript processes (see module docstring)."""
+
+    def __init__(self, jobs: Optional[int] = None, budget: Optional[int] = None, poll: float = 0.2):
+        self.concurrency = max(1, jobs or os.cpu_count() or 1)
+        self.budget = budget or memory_budget()
+        self.poll = poll
+
+    @property
+    def cap(self) -> int:
+        return self.budget // self.concurrency
+
+    def _admit(self, running: Dict[int, Tuple]) -> bool:
+        if len(running) >= self.concurrency:
+            return False
+        if not running:
+            return True
+        rss = _rss_by_group()
+        used = sum(rss.get(proc.pid, 0) for proc, _, _ in running.values())
+        return used + self.cap <= self.budget and available_memory() >= self.cap
+
+    def _spawn(self, code: str, form: str, cap: int):
+        from mathematica_export import WOLFRAMSCRIPT, _clean_env
+
+        wrapped = f"ToString[MemoryConstrained[({code}), {cap}, {MEMORY_EXCEEDED}], {form}]"
+        out = tempfile.TemporaryFile(mode="w+")
+        proc = subprocess.Popen(
+            [WOLFRAMSCRIPT, "-code", wrapped],
+            stdout=out,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            env=_clean_env(),
+            start_new_session=True,
+        )
+        return proc, out, cap
+
+    def run(
+        self,
+        codes: List[str],
+        *,
+        stop: Optional[Callable[[str], bool]] = None,
+        form: str = "InputForm",
+    ) -> List[Optional[str]]:
+        """Evaluate every code; outputs in input order, None for cancelled jobs."""
+        outputs: List[Optional[str]] = [None] * len(codes)
+        queue: Deque[int] = deque(range(len(codes)))
+        running: Dict[int, Tuple] = {}
+        cancelled = False
+        try:
+            while (queue and not cancelled) or running:
+                while queue and not cancelled and self._admit(running):
+                    i = queue.popleft()
+                    running[i] = self._spawn(codes[i], form, self.cap)
+                time.sleep(self.poll)
+
+                rss = _rss_by_group()
+                for i, (proc, out, cap) in list(running.items()):
+                    over = proc.poll() is None and rss.get(proc.pid, 0) > cap * _RSS_SLACK
+                    if over:
+                        _kill(proc)
+                        proc.wait()
+                    elif proc.poll() is None:
+                        continue
+                    del running[i]
+                    out.seek(0)
+                    text = out.read().strip()
+                    out.close()
+                    if cancelled:
+                        continue
+                    if over or text == MEMORY_EXCEEDED or proc.returncode == -signal.SIGKILL:
+                        if self.concurrency > 1:
+                            self.concurrency = max(1, self.concurrency // 2)
+                            print(f"Kernel job ran out of memory; retrying with {self.concurrency} kernel(s)")
+                            queue.appendleft(i)
+                        else:
+                            outputs[i] = MEMORY_EXCEEDED
+                        continue
+                    outputs[i] = text
+                    if stop is not None and stop(text):
+                        cancelled = True
+                        for other, _, _ in running.values():
+                            _kill(other)
+        finally:
+            for proc, out, _ in running.values():
+                _kill(proc)
+                out.close()
+        return outputs
+
+
+def run_parallel(
+    codes: List[str],
+    *,
+    jobs: Optional[int] = None,
+    stop: Optional[Callable[[str], bool]] = None,
+    form: str = "InputForm",
+    budget: Optional[int] = None,
+) -> List[Optional[str]]:
+    """Evaluate every code with a fresh `KernelScheduler`, at most `jobs` kernels at a time.
+
+    Returns the outputs in input order; jobs cancelled because an earlier
+    output satisfied `stop` give None.
+    """
+    return KernelScheduler(jobs=jobs, budget=budget).run(codes, stop=stop, form=form)
@@ -1,21 +1,41 @@
 from __future__ import annotations
 import os
-from typing import Iterable, Optional, Dict, Any
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Iterable, List, Optional, Dict, Any, Tuple
 import re
 
+from consensus import canonical_breakpoints, canonical_regions, vote
+from rate_limit import RateLimiter, backoff, retry_after, retryable, status_code
+
 try:
     from google import genai
 except ImportError as e:
     raise RuntimeError("Please install the new SDK: pip install google-genai") from e
 
 
-__all__ = ["configure", "generate_text", "stream_text"]
+__all__ = ["configure", "generate_text", "stream_text", "token_usage", "reset_token_usage"]
 
 _client: Optional["genai.Client"] = None
+# One client (and so one pooled HTTP connection set) is shared by all threads
+_client_lock = threading.Lock()
+
+# Attempts per request, including the first, on throttling / server errors / timeouts
+MAX_ATTEMPTS = 6
+
+_limiter = RateLimiter.from_env()
+# Whether this SDK accepts per-request HTTP options (used for deadlines)
+_PER_REQUEST_TIMEOUT = "http_options" in getattr(genai.types.GenerateContentConfig, "model_fields", {})
+
 
+def configure(api_key: Optional[str] = None, *, base_url: Optional[str] = None, **client_kwargs: Any) -> None:
+    """Create the shared client.
 
-def configure(api_key: Optional[str] = None, **client_kwargs: Any) -> None:
-    global _client
+    `base_url` (or $DECOMP_LLM_BASE_URL) points the client at another
+    endpoint, e.g. a local `fake_llm_server`.
+    """
+    global _client, _limiter
     # 1) Prefer explicitly passed key
     key = api_key
 
@@ -54,14 +74,128 @@ def configure(api_key: Optional[str] = None, **client_kwargs: Any) -> None:
             " or pass api_key=... to configure()."
         )
 
+    base_url = base_url or os.getenv("DECOMP_LLM_BASE_URL")
+    if base_url:
+        http_options = dict(client_kwargs.pop("http_options", None) or {})
+        http_options.setdefault("base_url", base_url)
+        client_kwargs["http_options"] = http_options
     _client = genai.Client(api_key=key, **client_kwargs)
+    _limiter = RateLimiter.from_env()
 
 
 def _client_or_configure() -> "genai.Client":
-    global _client
-    if _client is None:
-        configure()
-    return _client  # type: ignore[return-value]
+    with _client_lock:
+        if _client is None:
+            configure()
+        return _client  # type: ignore[return-value]
+
+
+def _with_retries(send, *, deadline: Optional[float], tokens: float):
+    """Call `send()` under the rate limiter, retrying transient failures until `deadline`.
+
+    Throttling pauses every thread for the provider's Retry-After (or the
+    backoff delay); other retryable errors only delay this request.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        _limiter.acquire(tokens, deadline)
+        try:
+            return send(deadline)
+        except Exception as e:
+            if not retryable(e) or attempt == MAX_ATTEMPTS - 1:
+                raise
+            delay = max(backoff(attempt), retry_after(e) or 0.0)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise
+            if status_code(e) == 429:
+                _limiter.pause(delay)
+            print(f'LLM request failed ({type(e).__name__}: {status_code(e) or e}); retrying in {delay:.1f}s')
+            time.sleep(delay)
+
+
+def _deadline_config(cfg: Dict[str, Any], deadline: Optional[float]) -> Dict[str, Any]:
+    """`cfg` with the time left before `deadline` as the HTTP timeout of this request."""
+    if deadline is None or not _PER_REQUEST_TIMEOUT:
+        return cfg
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise TimeoutError("LLM request deadline passed")
+    return {**cfg, "http_options": {"timeout": max(1, int(left * 1000))}}
+
+
+def _estimate_tokens(prompt: str, cached_prefix: Optional[str], max_output_tokens: int) -> int:
+    # ~4 characters per token is close enough for budgeting
+    return (len(prompt) + len(cached_prefix or "")) // 4 + max_output_tokens
+
+
+def _settle(estimated: int, meta: Any) -> None:
+    if meta is None:
+        return
+    actual = sum(
+        getattr(meta, name, None) or 0
+        for name in ("prompt_token_count", "candidates_token_count", "thoughts_token_count")
+    )
+    _limiter.settle(estimated, actual)
+
+
+@dataclass
+class TokenUsage:
+    requests: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.requests} requests, {self.prompt_tokens} input tokens "
+            f"({self.cached_tokens} served from cache), {self.output_tokens} output tokens"
+        )
+
+
+_usage = TokenUsage()
+_usage_lock = threading.Lock()
+
+
+def token_usage() -> TokenUsage:
+    """Snapshot of the token counts reported by the provider since the last reset."""
+    with _usage_lock:
+        return replace(_usage)
+
+
+def reset_token_usage() -> None:
+    global _usage
+    with _usage_lock:
+        _usage = TokenUsage()
+
+
+def _record_usage(meta: Any) -> None:
+    with _usage_lock:
+        _usage.requests += 1
+        if meta is None:
+            return
+        _usage.prompt_tokens += getattr(meta, "prompt_token_count", None) or 0
+        _usage.cached_tokens += getattr(meta, "cached_content_token_count", None) or 0
+        _usage.output_tokens += getattr(meta, "candidates_token_count", None) or 0
+
+
+def _request(
+    model: str,
+    prompt: str,
+    system_instruction: Optional[str],
+    cached_prefix: Optional[str],
+    gen_cfg: Dict[str, Any],
+) -> Tuple[str, Dict[str, Any]]:
+    """Contents and config for one call.
+
+    The static prefix is sent inline and always first. No cache is used,
+    explicit or implicit: the prompt prefixes are below the minimum size the
+    provider caches (see `prompts`). `token_usage().cached_tokens` reports
+    whatever the provider says it served from cache, which is 0 for them.
+    """
+    cfg = dict(gen_cfg)
+    if cached_prefix:
+        prompt = cached_prefix + prompt
+    contents = prompt if not system_instruction else f"{system_instruction.strip()}\n\n{prompt}"
+    return contents, cfg
 
 
 def generate_text(
@@ -73,15 +207,18 @@ def generate_text(
     max_output_tokens: int = 256,
     timeout: Optional[float] = 60.0,
     extra_generation_config: Optional[Dict[str, Any]] = None,
+    cached_prefix: Optional[str] = None,
 ) -> str:
     """
     Non-streaming text generation via the new SDK.
 
     - system_instruction: if provided, is prepended to the prompt (simple emulation)
     - extra_generation_config: merged into generation_config (e.g., {"top_p": 0.95})
+    - cached_prefix: static text that precedes `prompt`, kept identical across
+      calls; it is sent in full every time (see `prompts`)
+    - timeout: deadline in seconds for the whole call, retries included
     """
     c = _client_or_configure()
-    contents = prompt if not system_instruction else f"{system_instruction.strip()}\n\n{prompt}"
 
     gen_cfg: Dict[str, Any] = {
         "temperature": temperature,
@@ -94,11 +231,16 @@ def generate_text(
 
     # The google-genai client expects `config`, not `generation_config`.
     # `request_options` is not supported on this method signature here.
-    resp = c.models.generate_content(
-        model=model,
-        contents=contents,
-        config=gen_cfg,
-    )
+    deadline = time.monotonic() + timeout if timeout else None
+
+    def send(deadline: Optional[float]):
+        contents, cfg = _request(model, prompt, system_instruction, cached_prefix, gen_cfg)
+        return c.models.generate_content(model=model, contents=contents, config=_deadline_config(cfg, deadline))
+
+    estimated = _estimate_tokens(prompt, cached_prefix, max_output_tokens)
+    resp = _with_retries(send, deadline=deadline, tokens=estimated)
+    _record_usage(getattr(resp, "usage_metadata", None))
+    _settle(estimated, getattr(resp, "usage_metadata", None))
     return getattr(resp, "text", "") or ""
 
 
@@ -111,12 +253,16 @@ def stream_text(
     max_output_tokens: int = 1024,
     timeout: Optional[float] = 60.0,
     extra_generation_config: Optional[Dict[str, Any]] = None,
+    cached_prefix: Optional[str] = None,
 ) -> Iterable[str]:
     """
     Streaming text generation. Yields text chunks as they arrive.
+
+    `cached_prefix` and `timeout` behave as in `generate_text`. Failures
+    before the first chunk are retried; a stream that breaks or passes its
+    deadline after that raises, since its text cannot be resumed.
     """
     c = _client_or_configure()
-    contents = prompt if not system_instruction else f"{system_instruction.strip()}\n\n{prompt}"
 
     gen_cfg: Dict[str, Any] = {
         "temperature": temperature,
@@ -127,16 +273,28 @@ def stream_text(
     if extra_generation_config:
         gen_cfg.update(extra_generation_config)
 
+    deadline = time.monotonic() + timeout if timeout else None
+
     # Use the streaming variant of the API and pass `config`.
-    stream = c.models.generate_content_stream(
-        model=model,
-        contents=contents,
-        config=gen_cfg,
-    )
-    for chunk in stream:
+    def send(deadline: Optional[float]):
+        # The request is only sent once the stream is iterated, so pull the
+        # first chunk here to surface errors before anything is yielded.
+        contents, cfg = _request(model, prompt, system_instruction, cached_prefix, gen_cfg)
+        stream = iter(c.models.generate_content_stream(model=model, contents=contents, config=_deadline_config(cfg, deadline)))
+        return [next(stream, None)], stream
+
+    estimated = _estimate_tokens(prompt, cached_prefix, max_output_tokens)
+    head, stream = _with_retries(send, deadline=deadline, tokens=estimated)
+    meta = None
+    for chunk in (ch for part in (head, stream) for ch in part if ch is not None):
+        meta = getattr(chunk, "usage_metadata", None) or meta
         text = getattr(chunk, "text", None)
         if text:
             yield text
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError("LLM stream passed its deadline")
+    _record_usage(meta)
+    _settle(estimated, meta)
 
 def _parse_bracketed_list(text: str, *, coerce_numbers: bool = False):
     """Extract items from a bracketed list like "[a, b, c]".
@@ -168,44 +326,90 @@ def _parse_bracketed_list(text: str, *, coerce_numbers: bool = False):
     return [_coerce(p) for p in parts]
 
 
-def api_call(*, prompt: str, parse: bool = False, coerce_numbers: bool = False):
-    arr=[]
-    i=0
-    while True:
-        i+=1
-        final_value=''
-        stream = stream_text(prompt)
-        # Join streamed chunks without inserting extra spaces; normalize whitespace.
-        b = ''.join(a for a in stream).strip()
-        if b in arr:
-            final_value = b
-            break
-        else:
-            arr.append(b)
-        if i==15:
-            print('No common value found')
-            break
-            
-    # most_common is a method; call it. It returns (item, count) pairs.
+def _draw(prompt: str, prefix: Optional[str]) -> str:
+    """One sample; a request that still fails after retries gives an empty sample."""
+    try:
+        return ''.join(stream_text(prompt, cached_prefix=prefix))
+    except Exception as e:
+        print(f'LLM sample failed: {type(e).__name__}: {e}')
+        return ''
+
+
+def api_call(
+    *,
+    prompt: str,
+    parse: bool = False,
+    coerce_numbers: bool = False,
+    prefix: Optional[str] = None,
+    base_conditions: Iterable[str] = (),
+    k: int = 2,
+    n: int = 15,
+):
+    """Sample the LLM until k of at most n answers agree; return the agreed answer.
+
+    Answers are compared via `consensus.canonical_regions`, so subdomain order,
+    orientation of inequalities, whitespace and restated `base_conditions`
+    do not matter. The canonical form is returned ('' without consensus).
+    """
+    result = vote(
+        lambda: _draw(prompt, prefix),
+        canonical=lambda text: canonical_regions(text, base_conditions),
+        k=k,
+        n=n,
+    )
+    final_value = ''
+    if result is None or not result.reached:
+        print('No common value found')
+    else:
+        print(f'Consensus after {result.samples} samples (confidence {result.confidence:.2f})')
+        final_value = result.value
+
     if not parse:
         return final_value
     return _parse_bracketed_list(final_value, coerce_numbers=coerce_numbers)
 
-def api_call_series(*, prompt: str):
-    arr = []
-    for i in range(15):
-        stream = stream_text(prompt)
-            # Join streamed chunks without inserting extra spaces; normalize whitespace.
-        b = ''.join(a for a in stream).strip()
-        if b in arr:
-            return b
-            break
-        else:
-            arr.append(b)
-        if i==14:
-            print('Solution not found')
-            break
+def api_call_series(*, prompt: str, prefix: Optional[str] = None, k: int = 2, n: int = 15):
+    """Like `api_call` for breakpoint lists; returns None without consensus."""
+    result = vote(
+        lambda: _draw(prompt, prefix),
+        canonical=canonical_breakpoints,
+        k=k,
+        n=n,
+    )
+    if result is None or not result.reached:
+        print('Solution not found')
+        return None
+    print(f'Consensus after {result.samples} samples (confidence {result.confidence:.2f})')
+    return result.value
     
+def api_candidates(
+    *,
+    prompt: str,
+    prefix: Optional[str] = None,
+    base_conditions: Iterable[str] = (),
+    series: bool = False,
+    k: int = 2,
+    n: int = 15,
+) -> List[Tuple[str, int]]:
+    """Every distinct canonical answer drawn while voting, as (answer, votes), most voted first.
+
+    Same sampling as `api_call` / `api_call_series`, but the answers that did
+    not reach consensus are kept as further candidates instead of dropped.
+    """
+    canonical = canonical_breakpoints if series else (lambda text: canonical_regions(text, base_conditions))
+    result = vote(
+        lambda: _draw(prompt, prefix),
+        canonical=canonical,
+        k=k,
+        n=n,
+    )
+    if result is None:
+        print('No usable answer')
+        return []
+    status = 'Consensus' if result.reached else 'No consensus'
+    print(f'{status} after {result.samples} samples; {len(result.tally)} distinct candidate(s)')
+    return sorted(result.tally.items(), key=lambda item: -item[1])
+
 if __name__=="__main__":
 #     prompt = """Consider the domain x>0 and y>1. Then it is true that xy<= ylog[y]+exp[x]. However, this may be tricky to prove.
 
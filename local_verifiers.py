@@ -0,0 +1,65 @@
+"""Verifiers that close a region without Mathematica, tried before Resolve.
+
+A verifier is a function (variables, conds, lhs, rhs, c) -> LocalProof that
+tries to certify lhs <= 10^c * rhs on the region `conds` on its own, within
+its own time budget. Verifiers are registered by name and tried in
+registration order; the first one that succeeds decides the region.
+
+A certificate check closed this way records the verifier's name and its
+arguments, so `certificates.recheck` replays the same verifier rather than
+the Resolve query (which is usually what struggled on that region).
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from interval_prover import prove as interval_prove
+
+__all__ = ["LocalProof", "register", "registered", "attempt", "replay"]
+
+
+@dataclass
+class LocalProof:
+    proved: bool
+    # How it was proved (e.g. the number of boxes), or why not
+    detail: str = ""
+
+
+LocalVerifier = Callable[[str, str, str, str, int], LocalProof]
+
+_VERIFIERS: Dict[str, LocalVerifier] = {}
+
+
+def register(name: str, verify: LocalVerifier) -> None:
+    """Add (or replace) the verifier `name`; new names are tried last."""
+    _VERIFIERS[name] = verify
+
+
+def registered() -> List[str]:
+    return list(_VERIFIERS)
+
+
+def attempt(variables: str, conds: str, lhs: str, rhs: str, c: int = 0) -> Optional[Tuple[str, LocalProof]]:
+    """(name, proof) of the first verifier that certifies the region, else None."""
+    for name, verify in _VERIFIERS.items():
+        proof = verify(variables, conds, lhs, rhs, c)
+        if proof.proved:
+            return name, proof
+    return None
+
+
+def replay(name: str, args: Sequence[str], c: int) -> Optional[LocalProof]:
+    """Run verifier `name` again on stored arguments; None if it is not registered."""
+    verify = _VERIFIERS.get(name)
+    if verify is None or len(args) != 4:
+        return None
+    return verify(*args, c)
+
+
+def _interval(variables: str, conds: str, lhs: str, rhs: str, c: int) -> LocalProof:
+    result = interval_prove(variables, conds, lhs, rhs, c)
+    if result.proved:
+        return LocalProof(True, f"interval arithmetic, {result.boxes} boxes")
+    return LocalProof(False, result.reason)
+
+
+register("interval", _interval)
@@ -1,7 +1,16 @@
 import subprocess, shlex, os, shutil, json
-from typing import Any, List
-from llm_client import api_call, api_call_series
-from dataclasses import dataclass
+from typing import Any, List, Optional
+from llm_client import api_call, api_call_series, api_candidates, token_usage
+from certificates import Check, ProofCertificate, load_all, save
+from dataclasses import asdict, dataclass
+from dominance import dominant_reduction
+from entry import FactBase
+from local_verifiers import attempt as local_attempt
+from portfolio import Candidate, rank, verify_portfolio
+from prompts import question_prompt
+from retrieval import RetrievalIndex
+from shared import Term, split_top_level
+from symmetry import Chamber, scaling_reduction, symmetric_chamber
 import re
 
 def _resolve_wolframscript() -> str:
@@ -61,27 +70,129 @@ def wl_bool(expr: str) -> bool:
     if out == "False": return False
     raise ValueError(f"Unexpected output: {out!r}")
 
+WITNESS_BIGO = """witnessBigO[vars_, conds_, lhs_, rhs_, c_] := 
+  Module[{S}, S = If[conds === {}, True, And @@ conds];
+   Resolve[ForAll[vars, Implies[S, lhs <= 10^c*rhs]], Reals]];
+"""
+
+# lhs <= 10^c*rhs via lhs <= upper, lower <= rhs and upper <= 10^c*lower, each
+# one quantifier elimination on the region; anything but True if a step fails
+WITNESS_REDUCED = """witnessReduced[vars_, conds_, lhs_, rhs_, upper_, lower_, c_] := 
+  Module[{S, holds}, S = If[conds === {}, True, And @@ conds];
+   holds[ineq_] := Resolve[ForAll[vars, Implies[S, ineq]], Reals] === True;
+   If[holds[lhs <= upper] && holds[lower <= rhs] && holds[upper <= 10^c*lower], True, Undecided]];
+"""
+
+def _sequence(text: str) -> str:
+    """"{a, b}" or "a, b" -> "a, b" (the body of a WL list)."""
+    text = text.strip()
+    if text.startswith('{') and text.endswith('}'):
+        text = text[1:-1]
+    return text
+
+def region_conditions(question: "question", region: str) -> str:
+    """Domain conditions of `question` restricted to the subdomain `region`."""
+    return f"{_sequence(question.domain_description)}, {region}"
+
+def witness_call(vars: str, conds: str, lhs: str, rhs: str, c: int) -> str:
+    """The `witnessBigO[...]` call for one region (needs WITNESS_BIGO defined)."""
+    lhs_wl = lhs.replace('exp[', 'Exp[').replace('log[', 'Log[')
+    rhs_wl = rhs.replace('exp[', 'Exp[').replace('log[', 'Log[')
+    return f"witnessBigO[{{{_sequence(vars)}}}, {{{_sequence(conds)}}}, {lhs_wl}, {rhs_wl}, {c}]"
+
+def reduced_call(vars: str, conds: str, lhs: str, rhs: str, upper: str, lower: str, c: int) -> str:
+    """The `witnessReduced[...]` call for one region (needs WITNESS_REDUCED defined)."""
+    call = witness_call(vars, conds, lhs, rhs, c)
+    return "witnessReduced[" + call[len("witnessBigO["):-len(f"{c}]")] + f"{upper}, {lower}, {c}]"
+
+def witness_query(vars: str, conds: str, lhs: str, rhs: str, c: int) -> str:
+    """Self-contained script deciding lhs <= 10^c*rhs on `conds`."""
+    return WITNESS_BIGO + f"""
+{witness_call(vars, conds, lhs, rhs, c)}
+    """
+
+def wl_list(out: str, n: int) -> List[str]:
+    """Split the InputForm of a WL list of length n; anything else counts as n failures."""
+    out = out.strip()
+    if out.startswith("{") and out.endswith("}"):
+        items = split_top_level(out[1:-1])
+        if len(items) == n:
+            return [item.strip() for item in items]
+    return [out] * n
+
 #The following is to separate the executables
-def attempt_proof(vars,conds, lhs, rhs):
+def attempt_proof(vars,conds, lhs, rhs, checks: Optional[List[Check]] = None, two_sided: bool = False):
+    """Try to certify lhs << rhs on the region `conds` with Resolve.
+
+    When `checks` is given, every query sent to the CAS is appended to it as a
+    certificate `Check`, so callers can store the proof and replay it later.
+    If the region and the estimate are scaling invariant, one variable is
+    fixed to 1 first (see `symmetry.scaling_reduction`); the check keeps the
+    original region and records the reduction.
+    Regions are first handed to the local verifiers (`local_verifiers`, by
+    default the interval prover); only what they cannot close goes to Resolve.
+    With `two_sided`, rhs << lhs is certified as well: both directions
+    share the reduction and go to the same kernel session, and each gets
+    its own check.
+    Where the dominance engine can shrink the sides on the region
+    (`dominance.dominant_reduction`), Resolve first proves the reduced
+    inequality together with the reduction steps (lhs <= n*lead and
+    kept <= rhs), and falls back to the full one in the same call.
+    """
+    conds_text = _sequence(conds)
+    # Scale-invariant problems lose one variable before quantifier elimination
+    reduction = scaling_reduction(vars, conds, lhs, rhs)
+    if reduction is not None:
+        print(f'Reduced by scaling: {reduction.describe()}')
+        vars, conds, lhs, rhs = reduction.variables, reduction.conditions, reduction.lhs, reduction.rhs
+    directions = [(lhs, rhs), (rhs, lhs)] if two_sided else [(lhs, rhs)]
     # Demo usages
     for c in range(1):
         status= False
-        # normalize WL heads without changing math content
-        lhs_wl = lhs.replace('exp[', 'Exp[').replace('log[', 'Log[')
-        rhs_wl = rhs.replace('exp[', 'Exp[').replace('log[', 'Log[')
-        # ensure proper braces/sequence for vars and conds
-        vars_text = vars.strip()
-        if vars_text.startswith('{') and vars_text.endswith('}'):
-            vars_text = vars_text[1:-1]
-        conds_text = conds.strip()
-        if conds_text.startswith('{') and conds_text.endswith('}'):
-            conds_text = conds_text[1:-1]
-        a=wl_eval(f"""witnessBigO[vars_, conds_, lhs_, rhs_, c_] := 
-  Module[{{S}}, S = If[conds === {{}}, True, And @@ conds];
-   Resolve[ForAll[vars, Implies[S, lhs <= 10^c*rhs]], Reals]];
-
-witnessBigO[{{{vars_text}}}, {{{conds_text}}}, {lhs_wl}, {rhs_wl}, {c}]
-    """)
+        verdicts: List[str] = []
+        verifiers: List[str] = []
+        remote = []
+        for small, big in directions:
+            # Local verifiers first; Resolve gets the rest
+            local = local_attempt(vars, conds, small, big, c)
+            if local is not None:
+                verifiers.append(local[0])
+                print(f'Certified {small} << {big} locally by {local[1].detail}')
+                verdicts.append('True')
+            else:
+                verifiers.append('')
+                verdicts.append('')
+                remote.append(len(verdicts) - 1)
+        calls = [witness_call(vars, conds, small, big, c) for small, big in directions]
+        notes = [reduction.describe() if reduction else "" for _ in directions]
+        prelude = WITNESS_BIGO
+        for i in remote:
+            # Quantifier elimination on the dominant terms only; the full
+            # inequality is the fallback when that is not enough
+            dominant = dominant_reduction(vars, conds, *directions[i])
+            if dominant is not None:
+                print(f'Reduced to dominant terms: {dominant.describe()}')
+                reduced = reduced_call(vars, conds, *directions[i], dominant.lhs, dominant.rhs, c)
+                calls[i] = f"With[{{reducedVerdict = {reduced}}}, If[reducedVerdict === True, True, {calls[i]}]]"
+                notes[i] = "; ".join(n for n in (notes[i], dominant.describe()) if n)
+                prelude = WITNESS_BIGO + WITNESS_REDUCED
+        if len(remote) == 1:
+            verdicts[remote[0]] = wl_eval(prelude + f"\n{calls[remote[0]]}\n    ")
+        elif remote:
+            outs = wl_list(wl_eval(prelude + "\n{" + ",\n".join(calls[i] for i in remote) + "}"), len(remote))
+            for i, out in zip(remote, outs):
+                verdicts[i] = out
+        if checks is not None:
+            for (small, big), call, v, verifier, note in zip(directions, calls, verdicts, verifiers, notes):
+                checks.append(Check(region=conds_text, constant=c, query=prelude + f"\n{call}\n    ", verdict=v,
+                                    reduction=note, verifier=verifier,
+                                    verifier_args=[vars, conds, small, big] if verifier else []))
+        if all(v == 'True' for v in verdicts):
+            a = 'True'
+        elif 'False' in verdicts:
+            a = 'False'
+        else:
+            a = next(v for v in verdicts if v != 'True')
         if a == 'True':
             status = True
             return 'It is proved'
@@ -130,42 +241,124 @@ question_2 = question(variables = "x,y,z", domain_description = "x>0, y>0, z>0",
 # print(res)
 
 
-def try_and_prove(question : question):
-    prompt = f"""<code_editing_rules>
-  <guiding_principles>
-    – Be precise, avoid conflicting instructions
-    – Use natural subdomains so inequality proof is trivial
-    – Minimize the number of subdomains
-    – Output only subdomains, no extra words or symbols
-    – Use only <=, >=, <, >, Log[], Exp[] in the output. 
-    Only use Mathematical notation that the software Mathematica can parse
-  </guiding_principles>
-
-  <task>
-    Given domain: {question.domain_description}
-    Inequality: {question.lhs} <= {question.rhs}
-    Find minimal subdomains that make proving the inequality/asymptotic estimate trivial.
-    The union of these subdomains should be the whole domain.
-  </task>
-
-  <output_format>
-    [{' && '.join([p.strip() for p in question.domain_description.split(',')])} && subdomain1, {' && '.join([p.strip() for p in question.domain_description.split(',')])} && subdomain2, ...]. Hence, your output should in the form of an array
-  </output_format>
-</code_editing_rules>
-"""
-    res = api_call(prompt=prompt)
-    if res:
-        if res[0]=='[' and res[-1]==']':
-            res = res[1:-1]
-            print(res)
-            temp_arr = [element.strip() for element in res.split(',')]
-            if len(temp_arr)!=0:
-                count = 0
-                for num in range(len(temp_arr)):
-                    print(f"""The proof attempt in {temp_arr[num]} : {attempt_proof(question.variables, question.domain_description+f', {temp_arr[num]}', question.lhs, question.rhs)}""")
-                    count+=1
-                if count == len(temp_arr):
-                    print('Proved everywhere')
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", "", text.replace('exp[', 'Exp[').replace('log[', 'Log['))
+
+
+def _context(q: question):
+    """Variables and domain conditions, normalised so equal domains compare equal."""
+    vars_ = sorted(_normalize(v) for v in split_top_level(q.variables.strip().strip('{}')))
+    conds = sorted(_normalize(c) for c in split_top_level(q.domain_description.strip().strip('{}')))
+    return tuple(vars_), tuple(conds)
+
+
+def lemma_base(q: question, store: Optional[str] = None) -> FactBase:
+    """BigO facts from every proved question certificate on the same domain as `q`.
+
+    A two-sided certificate contributes both directions.
+    """
+    base = FactBase()
+    ctx = _context(q)
+    for cert in load_all(store):
+        if cert.kind != "question" or not cert.proved:
+            continue
+        lemma = question(**cert.problem)
+        if _context(lemma) != ctx:
+            continue
+        base.add(Term(rel="BigO", lhs=_normalize(lemma.lhs), rhs=_normalize(lemma.rhs)), reason=f"certificate {cert.key}")
+        if cert.two_sided:
+            base.add(Term(rel="BigO", lhs=_normalize(lemma.rhs), rhs=_normalize(lemma.lhs)), reason=f"certificate {cert.key}")
+    return base
+
+
+def propose_subdomains(question : question) -> List[str]:
+    """Ask the LLM for a decomposition of the domain of `question`."""
+    prompt = question_prompt(question)
+    res = api_call(prompt=prompt.suffix, prefix=prompt.prefix, base_conditions=split_top_level(_sequence(question.domain_description)))
+    print(f'LLM usage: {token_usage()}')
+    if res and res[0]=='[' and res[-1]==']':
+        res = res[1:-1]
+        print(res)
+        return split_top_level(res)
+    return []
+
+
+def propose_candidates(question : question, two_sided: bool = False) -> List[Candidate]:
+    """Every distinct decomposition the LLM proposed for `question`, ranked by `portfolio.rank`."""
+    prompt = question_prompt(question)
+    answers = api_candidates(prompt=prompt.suffix, prefix=prompt.prefix, base_conditions=split_top_level(_sequence(question.domain_description)))
+    print(f'LLM usage: {token_usage()}')
+    return rank(question, answers, two_sided=two_sided)
+
+
+def restrict(question : question, chamber: Chamber) -> question:
+    """`question` with its domain cut down to the ordered chamber."""
+    domain = ", ".join(x for x in (_sequence(question.domain_description), ", ".join(chamber.conditions)) if x.strip())
+    return type(question)(variables=question.variables, domain_description=domain, lhs=question.lhs, rhs=question.rhs)
+
+
+def verify_subdomains(question : question, temp_arr: List[str], chamber: Optional[Chamber] = None, two_sided: bool = False) -> bool:
+    """Check every subdomain with the CAS; store a certificate if all pass.
+
+    With a `chamber` of a symmetric problem, the subdomains only need to
+    cover the chamber; each one is intersected with it, and the
+    certificate for the original problem records the subdomains as given
+    together with the chamber. With `two_sided`, both lhs << rhs and
+    rhs << lhs are checked on every subdomain.
+    """
+    if len(temp_arr)==0:
+        return False
+    regions = temp_arr
+    if chamber is not None:
+        temp_arr = [f"{chamber.condition} && ({r})" for r in temp_arr]
+    checks: List[Check] = []
+    for num in range(len(temp_arr)):
+        print(f"""The proof attempt in {temp_arr[num]} : {attempt_proof(question.variables, region_conditions(question, temp_arr[num]), question.lhs, question.rhs, checks=checks, two_sided=two_sided)}""")
+    if chamber is not None:
+        for ch in checks:
+            ch.reduction = "; ".join(x for x in (chamber.describe(), ch.reduction) if x)
+    cert = ProofCertificate(
+        kind="question",
+        problem=asdict(question),
+        decomposition=list(regions),
+        checks=checks,
+        two_sided=two_sided,
+        chamber=chamber.classes if chamber is not None else [],
+    )
+    if cert.proved:
+        print('Proved everywhere')
+        print(f'Certificate written to {save(cert)}')
+    return cert.proved
+
+
+def try_and_prove(question : question, two_sided: bool = False) -> bool:
+    """Prove lhs << rhs on the domain of `question` (and rhs << lhs with `two_sided`)."""
+    base = lemma_base(question)
+    goals = [Term(rel="BigO", lhs=_normalize(question.lhs), rhs=_normalize(question.rhs))]
+    if two_sided:
+        goals.append(Term(rel="BigO", lhs=_normalize(question.rhs), rhs=_normalize(question.lhs)))
+    if all(base.derives(goal) for goal in goals):
+        print('It is proved from previously certified lemmas:')
+        for goal in goals:
+            for line in base.explain(goal):
+                print(f'  {line}')
+        return True
+
+    # Symmetric problems are decomposed and verified on one ordered chamber
+    chamber = symmetric_chamber(question.variables, question.domain_description, question.lhs, question.rhs)
+    if chamber is not None:
+        print(f'Symmetric problem: only the {chamber.describe()} is verified')
+
+    for similarity, regions in RetrievalIndex.open().nearest("question", question, chamber=chamber):
+        print(f'Trying a stored decomposition of a similar problem (similarity {similarity:.2f})')
+        if verify_subdomains(question, regions, chamber=chamber, two_sided=two_sided):
+            return True
+
+    # Every distinct LLM answer is a candidate, not only the consensus
+    target = restrict(question, chamber) if chamber is not None else question
+    candidates = propose_candidates(target, two_sided=two_sided)
+    verify = lambda regions: verify_subdomains(question, regions, chamber=chamber, two_sided=two_sided)
+    return verify_portfolio(candidates, verify) is not None
         
 
 
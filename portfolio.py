@@ -0,0 +1,159 @@
+"""Verify every distinct LLM answer, best first, instead of only the consensus.
+
+Sampling for consensus often draws several different decompositions; a
+valid one may be among those that never repeated. All distinct answers are
+kept as a portfolio, ranked by a cheap score and verified best first until
+one of them succeeds.
+
+The score of a question decomposition comes from a numeric pre-check on
+random points of the domain:
+
+- regions containing a point with lhs > rhs (or rhs > lhs, for two-sided
+  estimates) cannot pass the C = 10^0 check, so they count first;
+- answers whose regions miss sampled points of the domain come next;
+- then more votes, then fewer regions.
+
+Answers that miss sampled points do not cover the domain, so
+`verify_portfolio` never verifies them: proving the estimate on their
+regions would not prove it everywhere.
+"""
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+import sympy as sp
+
+from dominance import to_sympy
+from shared import split_conditions, split_top_level
+
+__all__ = ["Candidate", "numeric_test", "precheck", "rank", "verify_portfolio"]
+
+_SAMPLES = 200
+
+
+@dataclass
+class Candidate:
+    regions: List[str]
+    votes: int = 1
+    # from `precheck`: regions with a sampled counterexample, uncovered samples
+    violations: int = 0
+    uncovered: int = 0
+    checked: bool = field(default=False, repr=False)
+
+    @property
+    def score(self) -> Tuple[int, bool, int, int]:
+        return (self.violations, self.uncovered > 0, -self.votes, len(self.regions))
+
+
+def _names(text: str) -> List[str]:
+    text = text.strip()
+    if text.startswith("{") and text.endswith("}"):
+        text = text[1:-1]
+    return [v.strip() for v in split_top_level(text) if v.strip()]
+
+
+def numeric_test(conds: List[str], symbols: List[sp.Symbol]) -> Callable[[List[float]], bool]:
+    """Numeric test of a conjunction of conditions (False where it cannot be evaluated)."""
+    tests = []
+    for atom in conds:
+        rel = to_sympy(atom)
+        if rel is sp.true:
+            continue
+        if not isinstance(rel, sp.core.relational.Relational):
+            raise ValueError(f"Not a condition: {atom}")
+        f = sp.lambdify(symbols, rel.lhs - rel.rhs, "math")
+        tests.append((f, rel.rel_op))
+
+    def holds(point: List[float]) -> bool:
+        for f, op in tests:
+            try:
+                v = f(*point)
+            except (ArithmeticError, ValueError, TypeError, OverflowError):
+                return False
+            if not isinstance(v, float) and not isinstance(v, int):
+                return False
+            if not {"<": v < 0, "<=": v <= 0, ">": v > 0, ">=": v >= 0, "==": v == 0, "!=": v != 0}[op]:
+                return False
+        return True
+
+    return holds
+
+
+def _atoms(region: str) -> List[str]:
+    return split_conditions(region)
+
+
+def precheck(question, candidate: Candidate, samples: int = _SAMPLES, seed: int = 0, two_sided: bool = False) -> Candidate:
+    """Fill in `violations` and `uncovered` from random points of the domain of `question`."""
+    names = _names(question.variables)
+    symbols = [sp.Symbol(n) for n in names]
+    try:
+        in_domain = numeric_test(_atoms(", ".join(_names(question.domain_description))), symbols)
+        regions = [numeric_test(_atoms(r), symbols) for r in candidate.regions]
+        lhs = sp.lambdify(symbols, to_sympy(question.lhs), "math")
+        rhs = sp.lambdify(symbols, to_sympy(question.rhs), "math")
+    except Exception:
+        return candidate
+    rng = random.Random(seed)
+    violated = set()
+    uncovered = 0
+    found = 0
+    for _ in range(samples * 20):
+        if found == samples:
+            break
+        # Log-uniform magnitudes over [e^-4, e^4], occasionally negative
+        point = [math.exp(rng.uniform(-4, 4)) * (-1 if rng.random() < 0.2 else 1) for _ in names]
+        if not in_domain(point):
+            continue
+        found += 1
+        inside = [i for i, test in enumerate(regions) if test(point)]
+        if not inside:
+            uncovered += 1
+            continue
+        try:
+            l, r = lhs(*point), rhs(*point)
+        except (ArithmeticError, ValueError, TypeError, OverflowError):
+            continue
+        if not (isinstance(l, float) and isinstance(r, float)):
+            continue
+        if l > r * (1 + 1e-9) or (two_sided and r > l * (1 + 1e-9)):
+            violated.update(inside)
+    candidate.violations = len(violated)
+    candidate.uncovered = uncovered
+    candidate.checked = True
+    return candidate
+
+
+def rank(question, answers: List[Tuple[str, int]], two_sided: bool = False) -> List[Candidate]:
+    """Candidates from `api_candidates` answers, pre-checked and best first."""
+    candidates = []
+    for text, votes in answers:
+        text = text.strip()
+        if text[:1] in "[{" and text[-1:] in "]}":
+            text = text[1:-1]
+        regions = [r for r in split_top_level(text) if r.strip()]
+        if regions:
+            candidates.append(precheck(question, Candidate(regions=regions, votes=votes), two_sided=two_sided))
+    return sorted(candidates, key=lambda c: c.score)
+
+
+def verify_portfolio(
+    candidates: List[Candidate],
+    verify: Callable[[List[str]], bool],
+) -> Optional[Candidate]:
+    """Run `verify` on the candidates, best first, until one succeeds.
+
+    Candidates whose pre-check found uncovered points of the domain are
+    skipped. One candidate at a time: each verification already starts its own
+    kernels, and running candidates side by side would bypass the memory
+    admission of `kernels.KernelScheduler`.
+    """
+    for i, cand in enumerate(candidates):
+        print(f"Candidate {i + 1}/{len(candidates)} ({cand.votes} vote(s), {len(cand.regions)} region(s)): {cand.regions}")
+        if cand.uncovered > 0:
+            print(f"  skipped: {cand.uncovered} sampled point(s) of the domain are in no region")
+            continue
+        if verify(cand.regions):
+            return cand
+    return None
@@ -0,0 +1,101 @@
+"""Prompt builders for the decomposition requests.
+
+Each prompt is split into a static prefix (the guiding principles and
+formatting rules, identical for every problem of a kind) and a short
+per-problem suffix. `llm_client` sends the prefix first and unchanged.
+Nothing is cached today: the prefixes (about 100 and 460 tokens) are below
+the smallest prompt the provider caches, so every sample pays for the full
+prompt. The split only keeps the static text in one place and in front,
+where a provider cache could use it if the prefixes ever grow.
+"""
+from dataclasses import dataclass
+from typing import Any
+
+__all__ = ["Prompt", "QUESTION_PREFIX", "SERIES_PREFIX", "question_prompt", "series_prompt"]
+
+
+@dataclass(frozen=True)
+class Prompt:
+    prefix: str
+    suffix: str
+
+    @property
+    def text(self) -> str:
+        return self.prefix + self.suffix
+
+
+QUESTION_PREFIX = """<code_editing_rules>
+  <guiding_principles>
+    – Be precise, avoid conflicting instructions
+    – Use natural subdomains so inequality proof is trivial
+    – Minimize the number of subdomains
+    – Output only subdomains, no extra words or symbols
+    – Use only <=, >=, <, >, Log[], Exp[] in the output.
+    Only use Mathematical notation that the software Mathematica can parse
+  </guiding_principles>
+"""
+
+SERIES_PREFIX = """<code_editing_rules>
+    <guiding_principles>
+        – Be precise; avoid conflicting or circular instructions.
+        – Choose “natural” breakpoint scales where the term behavior changes (e.g., dominance switches, monotonicity kicks in, easy comparison with p-series/geometric/integral bounds).
+        – Minimize the number of breakpoints while ensuring the final bound is straightforward on each subrange.
+        – Cover the full index range from 0 to Infinity, with nonoverlapping, contiguous subranges.
+        – Do not use Floor[]/Ceiling[], etc. Just return the values as natural algebraic expressions. Also, algebraically simplify everything. For example, Sqrt[a^2] can be written as a. Assume everything is positive.
+        – Breakpoints may depend only on constants/parameters that appear in the series description.
+        – Use only Mathematica-parsable expressions for breakpoints, built from numbers, parameters, +, -, *, /, ^, Log[], Exp[], Sqrt[].
+        – Output only the breakpoint list; no extra words, symbols, or justification.
+    </guiding_principles>
+
+    <requirements_for_breakpoints>
+        – Start at 0 and end at Infinity.
+        – Strictly nondecreasing: 0 <= d_1 <= … <= d_n < Infinity.
+        – Each d_i must be a closed-form expression in the series parameters (if any), using only the allowed constructors above.
+        – Prefer canonical scales (e.g., powers/roots of parameters, thresholds defined by equating dominant terms) that make comparisons immediate. Also, algebraically simplify the break points as possible.
+        – Keep the list as short as possible while preserving triviality of the bound on each subrange.
+    </requirements_for_breakpoints>
+
+    <output_format>
+        [0, d1, d2, ..., Infinity]
+        # Return a list with the breakpoints only.
+    </output_format>
+"""
+
+
+def question_prompt(question: Any) -> Prompt:
+    base = ' && '.join([p.strip() for p in question.domain_description.split(',')])
+    suffix = f"""
+  <task>
+    Given domain: {question.domain_description}
+    Inequality: {question.lhs} <= {question.rhs}
+    Find minimal subdomains that make proving the inequality/asymptotic estimate trivial.
+    The union of these subdomains should be the whole domain.
+  </task>
+
+  <output_format>
+    [{base} && subdomain1, {base} && subdomain2, ...]. Hence, your output should in the form of an array
+  </output_format>
+</code_editing_rules>
+"""
+    return Prompt(QUESTION_PREFIX, suffix)
+
+
+def series_prompt(series: Any) -> Prompt:
+    suffix = f"""
+    <task>
+        We are given a series described by:
+        • formula: {series.formula}
+        • summation index: {series.summation_index}
+        • summation_bounds: {series.summation_bounds}
+        • conjectured_upper_asymptotic_bound: {series.conjectured_upper_asymptotic_bound}
+        • Import definition to understand: Given two functions f and g, f << g means that there exists a positive constant C>0 such that f <= C*g everywhere in the domain
+
+
+        Goal: Return a minimal list of breakpoints [0, d_1, …, d_n, Infinity] such that proving
+        Sum[formula, summation_bounds restricted to each consecutive subrange]
+        << conjectured_upper_asymptotic_bound
+        is trivial on every subrange (e.g., via a simple termwise bound, a direct comparison to a standard convergent series, or the integral test with monotonicity).
+    </task>
+    </code_editing_rules>
+    """
+    return Prompt(SERIES_PREFIX, suffix)
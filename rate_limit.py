@@ -0,0 +1,150 @@
+"""Client-side rate limiting and retry policy for LLM requests.
+
+The package's own commands (consensus voting, the candidate portfolio,
+`decomp watch`) send their samples one after another. The limiter is
+still process-wide and thread-safe: the client is shared by every thread
+of a process, so a caller that runs several proofs from threads at once
+stays within the provider limits as a whole, not per call:
+
+- `RateLimiter` holds two token buckets, one for requests and one for
+  tokens per minute. A request waits until both have room, or fails once
+  its deadline would pass. A throttling response pauses every thread.
+- `backoff` gives jittered exponential delays ("full jitter"), and
+  `retry_after` reads the provider's hint when there is one.
+- `retryable` tells throttling, server errors and timeouts apart from
+  errors a retry cannot fix.
+
+Limits come from $DECOMP_LLM_RPM and $DECOMP_LLM_TPM (0 means unlimited).
+"""
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+__all__ = ["TokenBucket", "RateLimiter", "backoff", "retry_after", "retryable", "status_code"]
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """`capacity` units refilled continuously at `rate` units per second."""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.level = capacity
+        self.stamp = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)."""
+        self._refill(now)
+        # A request larger than the bucket only has to wait for a full one
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= amount
+
+    def give(self, amount: float) -> None:
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits shared by all threads."""
+
+    def __init__(self, rpm: float = 0, tpm: float = 0):
+        self.requests = TokenBucket(rpm, rpm / 60.0) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm, tpm / 60.0) if tpm > 0 else None
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        def limit(name: str, default: float) -> float:
+            try:
+                return float(os.environ.get(name, default))
+            except ValueError:
+                return default
+        return cls(rpm=limit("DECOMP_LLM_RPM", 60), tpm=limit("DECOMP_LLM_TPM", 0))
+
+    def acquire(self, tokens: float = 0, deadline: Optional[float] = None) -> None:
+        """Block until one request of about `tokens` tokens may be sent.
+
+        Raises TimeoutError if that would be after `deadline` (a time.monotonic() value).
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(0.0, self.paused_until - now)
+                if self.requests is not None:
+                    wait = max(wait, self.requests.wait_time(1, now))
+                if self.tokens is not None:
+                    wait = max(wait, self.tokens.wait_time(tokens, now))
+                if wait == 0:
+                    if self.requests is not None:
+                        self.requests.take(1)
+                    if self.tokens is not None:
+                        self.tokens.take(min(tokens, self.tokens.capacity))
+                    return
+            if deadline is not None and now + wait > deadline:
+                raise TimeoutError("LLM request deadline passed while waiting for the rate limiter")
+            time.sleep(wait)
+
+    def settle(self, estimated: float, actual: float) -> None:
+        """Correct the token bucket once the real usage of a request is known."""
+        if self.tokens is None:
+            return
+        with self._lock:
+            if actual > estimated:
+                self.tokens.take(actual - estimated)
+            else:
+                self.tokens.give(estimated - actual)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every request back for `seconds`, e.g. after a 429."""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def backoff(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Delay before retry number `attempt` (0-based): uniform in [0, min(cap, base*2^attempt)]."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+    for attr in ("code", "status_code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After header on the error's response, if any."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return max(0.0, float(headers.get("retry-after")))
+    except (TypeError, ValueError):
+        return None
+
+
+def retryable(exc: BaseException) -> bool:
+    code = status_code(exc)
+    if code is not None:
+        return code in RETRYABLE_STATUS
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    # httpx / requests transport errors, without importing either
+    name = type(exc).__name__
+    return any(word in name for word in ("Timeout", "Connect", "RemoteProtocol", "ReadError"))
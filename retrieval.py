@@ -0,0 +1,270 @@
+"""Index of verified decompositions, keyed by the shape of the problem.
+
+Problems that only differ in variable names or in numeric constants, such
+as AM-GM variants or series with the same summand skeleton, usually admit
+the same decomposition. Every proved certificate in the store is indexed
+under a structural fingerprint: the problem's expressions with variables
+renamed canonically (v0, v1, ...) and every number other than 0, 1, -1
+replaced by a placeholder. A new problem first tries the decompositions of
+the nearest stored problems, renamed to its own variables, before any LLM
+call is made.
+
+When the fingerprints match exactly, the constants of the two problems
+correspond one to one, and every constant of the stored problem that
+appears in a stored region is replaced by the new problem's constant (e.g.
+x > 2 becomes x > 5). Constants derived from them (4 = 2^2) and the
+constants of merely similar problems are reused as they are; the
+verification that follows decides whether they still work.
+"""
+import json
+import os
+import re
+import tempfile
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from itertools import permutations
+from typing import Any, Dict, List, Optional, Tuple
+
+import sympy as sp
+
+from certificates import ProofCertificate, default_store, load_all
+from dominance import to_sympy, to_wl
+from shared import split_conditions, split_top_level
+from symmetry import Chamber
+
+__all__ = ["Shape", "shape_of", "RetrievalIndex"]
+
+_CONSTANT = sp.Symbol("K")
+# Beyond this many variables only the given variable order is tried.
+_MAX_PERMUTED = 5
+
+
+@dataclass
+class Shape:
+    fingerprint: str
+    features: Dict[str, int]
+    # original variable names, in canonical order (v0, v1, ...)
+    variables: List[str]
+    # the constants replaced by the placeholder, in canonical order
+    constants: List[str] = field(default_factory=list)
+
+
+def _names(text: str) -> List[str]:
+    return [v.strip() for v in split_top_level(text.strip().strip("{}")) if v.strip()]
+
+
+def _parts(kind: str, problem: Dict[str, Any]) -> Tuple[List[str], List[str], List[str], List[str]]:
+    """(fixed variables, permutable variables, expressions, conditions) of a problem."""
+    if kind == "series":
+        conds = split_conditions(problem["conditions"])
+        exprs = [problem["formula"], problem["conjectured_upper_asymptotic_bound"]]
+        return [problem["summation_index"]], _names(problem["other_variables"]), exprs, conds
+    conds = split_conditions(problem["domain_description"])
+    return [], _names(problem["variables"]), [problem["lhs"], problem["rhs"]], conds
+
+
+def _abstract(expr: sp.Basic) -> sp.Basic:
+    return expr.replace(lambda a: a.is_Number and a not in (0, 1, -1), lambda a: _CONSTANT)
+
+
+def _features(exprs: List[sp.Basic]) -> Dict[str, int]:
+    counts: Counter = Counter()
+    for e in exprs:
+        for node in sp.preorder_traversal(e):
+            if node.is_Symbol:
+                counts["K" if node == _CONSTANT else "v"] += 1
+            elif node.is_Number:
+                counts[str(node)] += 1
+            else:
+                counts[f"{type(node).__name__}/{len(node.args)}"] += 1
+    return dict(counts)
+
+
+def shape_of(kind: str, problem: Any) -> Optional[Shape]:
+    """Structural fingerprint of a `question` / `series_to_bound` (or its asdict)."""
+    if not isinstance(problem, dict):
+        problem = asdict(problem)
+    fixed, free, exprs, conds = _parts(kind, problem)
+    try:
+        parsed = [to_sympy(e) for e in exprs]
+        parsed_conds = [to_sympy(c) for c in conds]
+    except Exception:
+        return None
+    # Symbols that are not declared variables (parameters) come last
+    declared = set(fixed) | set(free)
+    extra = sorted({s.name for e in parsed + parsed_conds for s in e.free_symbols} - declared)
+    orders = permutations(free) if len(free) <= _MAX_PERMUTED else [tuple(free)]
+
+    best: Optional[Tuple[str, List[str], List[sp.Basic], List[sp.Basic]]] = None
+    for order in orders:
+        names = list(fixed) + list(order) + extra
+        rename = {sp.Symbol(n): sp.Symbol(f"v{i}") for i, n in enumerate(names)}
+        main = [e.xreplace(rename) for e in parsed]
+        side = sorted((c.xreplace(rename) for c in parsed_conds), key=lambda c: sp.srepr(_abstract(c)))
+        abstracted = [_abstract(e) for e in main + side]
+        text = sp.srepr(tuple(abstracted[:len(main)])) + "|" + sp.srepr(tuple(abstracted[len(main):]))
+        if best is None or text < best[0]:
+            best = (text, names, abstracted, main + side)
+    text, names, abstracted, concrete = best
+    constants = [str(node) for e in concrete for node in sp.preorder_traversal(e) if node.is_Number and node not in (0, 1, -1)]
+    return Shape(fingerprint=text, features=_features(abstracted), variables=names, constants=constants)
+
+
+def _similarity(a: Dict[str, int], b: Dict[str, int]) -> float:
+    keys = set(a) | set(b)
+    inter = sum(min(a.get(k, 0), b.get(k, 0)) for k in keys)
+    union = sum(max(a.get(k, 0), b.get(k, 0)) for k in keys)
+    return inter / union if union else 0.0
+
+
+def _constant_map(old: List[str], new: List[str]) -> Dict[sp.Basic, sp.Basic]:
+    """Old constant -> new constant, empty if the correspondence is not one to one."""
+    if len(old) != len(new):
+        return {}
+    mapping: Dict[sp.Basic, sp.Basic] = {}
+    for a, b in zip(old, new):
+        a_, b_ = sp.sympify(a), sp.sympify(b)
+        if mapping.setdefault(a_, b_) != b_:
+            return {}
+    if len(set(mapping.values())) != len(mapping):
+        return {}
+    return {a: b for a, b in mapping.items() if a != b}
+
+
+def _substitute_constants(region: str, mapping: Dict[sp.Basic, sp.Basic]) -> str:
+    if not mapping:
+        return region
+    try:
+        atoms = [to_sympy(a).xreplace(mapping) for a in split_conditions(region)]
+    except Exception:
+        return region
+    return " && ".join(to_wl(a) for a in atoms) or region
+
+
+def _rename(text: str, mapping: Dict[str, str]) -> str:
+    if not mapping:
+        return text
+    pattern = re.compile(r"(?<![A-Za-z0-9$])(" + "|".join(map(re.escape, mapping)) + r")(?![A-Za-z0-9$])")
+    return pattern.sub(lambda m: mapping[m.group(1)], text)
+
+
+class RetrievalIndex:
+    """Fingerprints of the proved certificates in a store, cached in .retrieval-index.json."""
+
+    def __init__(self, path: str, entries: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.path = path
+        # certificate key -> {kind, fingerprint, features, nvars, decomposition, chamber, ...}
+        self.entries: Dict[str, Dict[str, Any]] = entries or {}
+
+    @classmethod
+    def open(cls, store: Optional[str] = None) -> "RetrievalIndex":
+        """Load the index of `store` and bring it up to date with the certificates.
+
+        Certificates that are new or were rewritten since they were indexed
+        are (re)indexed; entries whose certificate is gone or no longer
+        proved are dropped.
+        """
+        store = store or default_store()
+        path = os.path.join(store, ".retrieval-index.json")
+        entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+            except (OSError, ValueError):
+                entries = {}
+        index = cls(path, entries)
+        changed = False
+        current = set()
+        for cert in load_all(store):
+            if not cert.proved:
+                continue
+            current.add(cert.key)
+            entry = index.entries.get(cert.key)
+            if entry is None or entry.get("created") != cert.created:
+                changed |= index.add(cert)
+        for key in set(index.entries) - current:
+            del index.entries[key]
+            changed = True
+        if changed:
+            index.save()
+        return index
+
+    def add(self, cert: ProofCertificate) -> bool:
+        shape = shape_of(cert.kind, cert.problem)
+        if shape is None:
+            return False
+        to_slot = {name: f"${i}$" for i, name in enumerate(shape.variables)}
+        self.entries[cert.key] = {
+            "kind": cert.kind,
+            "fingerprint": shape.fingerprint,
+            "features": shape.features,
+            "nvars": len(shape.variables),
+            "decomposition": [_rename(r, to_slot) for r in cert.decomposition],
+            "chamber": [[to_slot[n] for n in cls] for cls in cert.chamber if all(n in to_slot for n in cls)],
+            "constants": shape.constants,
+            "created": cert.created,
+        }
+        return True
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # A unique temp file per writer, as in `certificates.save`
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def nearest(
+        self,
+        kind: str,
+        problem: Any,
+        *,
+        k: int = 2,
+        min_similarity: float = 0.6,
+        chamber: Optional[Chamber] = None,
+    ) -> List[Tuple[float, List[str]]]:
+        """Up to `k` stored decompositions for `problem`, renamed to its variables.
+
+        Exact fingerprint matches have similarity 1.0 and get the problem's
+        own constants (see the module docstring); other candidates are
+        ranked by the overlap of their node-type counts. Identical
+        decompositions are only returned once. A decomposition that only
+        covers a symmetric chamber is only offered when `chamber`, the
+        chamber `problem` is verified on, is the same one.
+        """
+        shape = shape_of(kind, problem)
+        if shape is None:
+            return []
+        from_slot = {f"${i}$": name for i, name in enumerate(shape.variables)}
+        scored = []
+        for entry in self.entries.values():
+            if entry["kind"] != kind or entry["nvars"] != len(shape.variables):
+                continue
+            stored = [[from_slot[n] for n in cls] for cls in entry.get("chamber", [])]
+            if stored and (chamber is None or stored != chamber.classes):
+                continue
+            constants: Dict[sp.Basic, sp.Basic] = {}
+            if entry["fingerprint"] == shape.fingerprint:
+                score = 1.0
+                constants = _constant_map(entry.get("constants", []), shape.constants)
+            else:
+                score = _similarity(entry["features"], shape.features)
+            if score >= min_similarity:
+                regions = [
+                    _substitute_constants(re.sub(r"\$\d+\$", lambda m: from_slot[m.group(0)], r), constants)
+                    for r in entry["decomposition"]
+                ]
+                scored.append((score, regions))
+        scored.sort(key=lambda item: -item[0])
+        out: List[Tuple[float, List[str]]] = []
+        for score, regions in scored:
+            if all(regions != r for _, r in out):
+                out.append((score, regions))
+            if len(out) == k:
+                break
+        return out
@@ -1,8 +1,14 @@
 import subprocess, shlex, os, shutil, json
-from typing import Any, List
-from llm_client import api_call, api_call_series
-from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from llm_client import api_call, api_call_series, api_candidates, token_usage
+from dataclasses import asdict, dataclass
 import re
+from certificates import Check, ProofCertificate, save
+from consensus import canonical_atom
+from dominance import reduced_form
+from prompts import series_prompt
+from retrieval import RetrievalIndex
+from shared import split_top_level
 import tempfile, pathlib, subprocess, os
 
 def wl_run_file(code: str, form: str = "InputForm") -> str:
@@ -115,116 +121,81 @@ class series_to_bound:
     conjectured_upper_asymptotic_bound: str
     
 
-    
+def _reduce_subranges(series: series_to_bound, points: List[str]):
+    """Pick the leading summands of every subrange on the Python side.
 
-def ask_llm_series(series: series_to_bound):
-    prompt = f"""<code_editing_rules>
-    <guiding_principles>
-        – Be precise; avoid conflicting or circular instructions.
-        – Choose “natural” breakpoint scales where the term behavior changes (e.g., dominance switches, monotonicity kicks in, easy comparison with p-series/geometric/integral bounds).
-        – Minimize the number of breakpoints while ensuring the final bound is straightforward on each subrange.
-        – Cover the full index range from 0 to Infinity, with nonoverlapping, contiguous subranges.
-        – Do not use Floor[]/Ceiling[], etc. Just return the values as natural algebraic expressions. Also, algebraically simplify everything. For example, Sqrt[a^2] can be written as a. Assume everything is positive.
-        – Breakpoints may depend only on constants/parameters that appear in the series description.
-        – Use only Mathematica-parsable expressions for breakpoints, built from numbers, parameters, +, -, *, /, ^, Log[], Exp[], Sqrt[].
-        – Output only the breakpoint list; no extra words, symbols, or justification.
-    </guiding_principles>
-
-    <task>
-        We are given a series described by:
-        • formula: {series.formula}
-        • summation index: {series.summation_index}
-        • summation_bounds: {series.summation_bounds}
-        • conjectured_upper_asymptotic_bound: {series.conjectured_upper_asymptotic_bound}
-        • Import definition to understand: Given two functions f and g, f << g means that there exists a positive constant C>0 such that f <= C*g everywhere in the domain
-        
-
-        Goal: Return a minimal list of breakpoints [0, d_1, …, d_n, Infinity] such that proving
-        Sum[formula, summation_bounds restricted to each consecutive subrange]
-        << conjectured_upper_asymptotic_bound
-        is trivial on every subrange (e.g., via a simple termwise bound, a direct comparison to a standard convergent series, or the integral test with monotonicity).
-    </task>
-
-    <requirements_for_breakpoints>
-        – Start at 0 and end at Infinity.
-        – Strictly nondecreasing: 0 <= d_1 <= … <= d_n < Infinity.
-        – Each d_i must be a closed-form expression in the series parameters (if any), using only the allowed constructors above.
-        – Prefer canonical scales (e.g., powers/roots of parameters, thresholds defined by equating dominant terms) that make comparisons immediate. Also, algebraically simplify the break points as possible.
-        – Keep the list as short as possible while preserving triviality of the bound on each subrange.
-    </requirements_for_breakpoints>
-
-    <output_format>
-        [0, d1, d2, ..., Infinity]
-        # Return a list with the breakpoints only.
-    </output_format>
-    </code_editing_rules>
+    Returns one `ReducedForm` per consecutive pair of breakpoints, or None if
+    the formula or breakpoints cannot be parsed (the prelude then does all of
+    the work, as before).
     """
-    response = api_call_series(prompt=prompt)
-    if response[0]=='[' and response[-1]==']':
-        response = '{'+response[1:-1]+'}'
-    print(response)
-    
-    count=0
-    
-    for c in range(5):
-
-        a = wl_eval (f"""
+    idx = series.summation_index
+    base = ' && '.join([idx+">1", series.conditions])
+    forms = []
+    for lo, hi in zip(points, points[1:]):
+        try:
+            forms.append(reduced_form(series.formula, f"{base} && {idx} > {lo} && {idx} < {hi}"))
+        except Exception:
+            return None
+    return forms
+
+
+SERIES_PRELUDE = """
         Clear[LeadingSummand, DominancePiecewise, LeastSummand, \
         AntiDominancePiecewise,
             expandPowersInProductNoNumbers, reducedForm, createAssums, \
-        calculateEstimates];
+        calculateEstimates, calculateReducedEstimates];
 
-        LeadingSummand[sum_, assum_] := Module[{{terms, vars, dominatesQ, \
-        winners}},
+        LeadingSummand[sum_, assum_] := Module[{terms, vars, dominatesQ, \
+        winners},
         terms = DeleteCases[List @@ Expand[sum], 0];
-        If[!ListQ[terms], terms = {{terms}}];
-        If[terms === {{}}, Return[0]];
+        If[!ListQ[terms], terms = {terms}];
+        If[terms === {}, Return[0]];
         If[Length[terms] == 1, Return[First[terms]]];
-        vars = Variables[{{sum, assum}}];
+        vars = Variables[{sum, assum}];
         dominatesQ[t_] := Resolve[
             ForAll[vars, Implies[assum, And @@ Thread[t >= DeleteCases[terms, \
         t, 1, 1]]]],
             Reals
         ];
         winners = Select[terms, TrueQ @ dominatesQ[#] &];
-        Which[winners =!= {{}}, First[winners],
+        Which[winners =!= {}, First[winners],
                 True, Simplify[DominancePiecewise[terms, assum, vars], \
         assum]]
         ];
 
-        DominancePiecewise[terms_, assum_, vars_] := Module[{{conds}},
+        DominancePiecewise[terms_, assum_, vars_] := Module[{conds},
         conds = Table[
             Reduce[assum && And @@ Thread[ti >= DeleteCases[terms, ti, 1, \
         1]], vars, Reals],
-            {{ti, terms}}
+            {ti, terms}
         ];
-        Piecewise[Transpose[{{terms, conds}}]]
+        Piecewise[Transpose[{terms, conds}]]
         ];
 
-        LeastSummand[sum_, assum_] := Module[{{terms, vars, leastQ, winners}},
+        LeastSummand[sum_, assum_] := Module[{terms, vars, leastQ, winners},
         terms = DeleteCases[List @@ Expand[sum], 0];
-        If[!ListQ[terms], terms = {{terms}}];
-        If[terms === {{}}, Return[0]];
+        If[!ListQ[terms], terms = {terms}];
+        If[terms === {}, Return[0]];
         If[Length[terms] == 1, Return[First[terms]]];
-        vars = Variables[{{sum, assum}}];
+        vars = Variables[{sum, assum}];
         leastQ[t_] := Resolve[
             ForAll[vars, Implies[assum, And @@ Thread[t <= DeleteCases[terms, \
         t, 1, 1]]]],
             Reals
         ];
         winners = Select[terms, TrueQ @ leastQ[#] &];
-        Which[winners =!= {{}}, First[winners],
+        Which[winners =!= {}, First[winners],
                 True, Simplify[AntiDominancePiecewise[terms, assum, vars], \
         assum]]
         ];
 
-        AntiDominancePiecewise[terms_, assum_, vars_] := Module[{{conds}},
+        AntiDominancePiecewise[terms_, assum_, vars_] := Module[{conds},
         conds = Table[
             Reduce[assum && And @@ Thread[ti <= DeleteCases[terms, ti, 1, \
         1]], vars, Reals],
-            {{ti, terms}}
+            {ti, terms}
         ];
-        Piecewise[Transpose[{{terms, conds}}]]
+        Piecewise[Transpose[{terms, conds}]]
         ];
 
         expandPowersInProductNoNumbers[expr_] :=
@@ -232,12 +203,12 @@ def ask_llm_series(series: series_to_bound):
             Replace[List @@ expr,
             Power[base_, n_Integer?Positive] :> Sequence @@ \
         ConstantArray[base, n],
-            {{1}}
+            {1}
             ],
             Not[NumericQ[#]] &
         ];
 
-        reducedForm[expr_, assum_] := Module[{{numr, denr, simpn, simpd}},
+        reducedForm[expr_, assum_] := Module[{numr, denr, simpn, simpd},
         numr = expandPowersInProductNoNumbers @ Numerator @ Simplify[expr, \
         Assumptions -> assum];
         denr = expandPowersInProductNoNumbers @ Denominator @ \
@@ -247,36 +218,262 @@ def ask_llm_series(series: series_to_bound):
         Simplify[simpn/simpd, Assumptions -> assum]
         ];
 
-        createAssums[baseAssums_, points_] := Module[{{p}},
+        createAssums[baseAssums_, points_] := Module[{p},
         p = Partition[points, 2, 1];
         baseAssums && d > #[[1]] && d < #[[2]] & /@ p
         ];
 
-        calculateEstimates[expr_, baseAssums_, points_] := Module[{{assums, \
-        part}},
+        calculateEstimates[expr_, baseAssums_, points_] := Module[{assums, \
+        part},
         assums = createAssums[baseAssums, points];
         part   = Prepend[#, d] & /@ Partition[points, 2, 1];
         MapThread[
             Integrate[reducedForm[expr, #1], #2, Assumptions -> #1] &,
-            {{assums, part}}
+            {assums, part}
         ]
         ];
 
-        res1 = Flatten@calculateEstimates[{series.formula}, {' && '.join([series.summation_index+">1", series.conditions])},{response}];
+        calculateReducedEstimates[reduced_, baseAssums_, points_] := Module[{assums, \
+        part},
+        assums = createAssums[baseAssums, points];
+        part   = Prepend[#, d] & /@ Partition[points, 2, 1];
+        MapThread[
+            Integrate[Simplify[#1, Assumptions -> #2], #3, Assumptions -> #2] &,
+            {reduced, assums, part}
+        ]
+        ];
+"""
+
+
+def propose_breakpoints(series: series_to_bound):
+    """Ask the LLM for breakpoints; returns a WL list "{0, ..., Infinity}" or None."""
+    prompt = series_prompt(series)
+    response = api_call_series(prompt=prompt.suffix, prefix=prompt.prefix)
+    print(f'LLM usage: {token_usage()}')
+    if not response:
+        return None
+    if response[0]=='[' and response[-1]==']':
+        response = '{'+response[1:-1]+'}'
+    return response
+
+
+def propose_breakpoint_candidates(series: series_to_bound) -> List[str]:
+    """Every distinct breakpoint list the LLM proposed, most voted (then fewest points) first."""
+    prompt = series_prompt(series)
+    answers = api_candidates(prompt=prompt.suffix, prefix=prompt.prefix, series=True)
+    print(f'LLM usage: {token_usage()}')
+    answers.sort(key=lambda item: (-item[1], len(split_top_level(item[0][1:-1]))))
+    return ['{'+text[1:-1]+'}' for text, _ in answers if text[:1] == '[' and text[-1:] == ']']
+
+
+def series_estimates(series: series_to_bound, response: str, reduced=None) -> str:
+    """WL expression for the list of per-subrange estimates of `series`."""
+    base = ' && '.join([series.summation_index+'>1', series.conditions])
+    if reduced is None:
+        reduced = _reduce_subranges(series, split_top_level(response[1:-1]))
+    if reduced is not None:
+        return f"calculateReducedEstimates[{{{', '.join(r.wl for r in reduced)}}}, {base},{response}]"
+    return f"calculateEstimates[{series.formula}, {base},{response}]"
+
+
+def series_query(series: series_to_bound, response: str, c: int, reduced=None) -> str:
+    """Full script checking every subrange estimate against 10^c times the bound."""
+    return SERIES_PRELUDE + f"""
+        res1 = Flatten@{series_estimates(series, response, reduced)};
 
         res2= Resolve[ForAll[{series.other_variables}, 
-            Implies[{series.conditions}, # <= 10^{c}*{series.conjectured_upper_asymptotic_bound}]], Reals] & /@ res1;
+            Implies[{series.conditions}, # <= 10^{c}*({series.conjectured_upper_asymptotic_bound})]], Reals] & /@ res1;
             
         If[AllTrue[res2,TrueQ],True,res2]
-        """)
-        if a == "True":
-            print('All estimates verified')
-            break
+        """
+
+
+def subrange_query(series: series_to_bound, lo: str, hi: str, reduced=None, c=None) -> str:
+    """Script for the single subrange lo < index < hi.
+
+    With c=None it returns the smallest c in 0..4 for which the estimate is
+    at most 10^c times the bound, or False; with a given c it returns True
+    or the Resolve results (the form stored in certificates).
+    """
+    points = f"{{{lo}, {hi}}}"
+    check = f"""Resolve[ForAll[{series.other_variables}, 
+            Implies[{series.conditions}, # <= 10^c*({series.conjectured_upper_asymptotic_bound})]], Reals] & /@ res1"""
+    if c is None:
+        result = f"Catch[Do[If[AllTrue[{check}, TrueQ], Throw[c]], {{c, 0, 4}}]; False]"
+    else:
+        result = f"Block[{{c = {c}}}, With[{{res2 = {check}}}, If[AllTrue[res2, TrueQ], True, res2]]]"
+    return SERIES_PRELUDE + f"""
+        res1 = Flatten@{series_estimates(series, points, reduced)};
+
+        {result}
+        """
+
+
+def two_sided_query(series: series_to_bound, response: str, reduced=None, c=None, side: str = "upper") -> str:
+    """Script checking the bound from above and below on the same estimates.
+
+    The subrange estimates are computed once. Each is compared with
+    10^c times the bound (upper), and their total with 10^-c times the bound
+    (lower). The lower side compares integrals of the reduced summands with
+    the bound. That is only evidence, not a proof, that the sum itself is
+    bounded below: it also needs a monotone summand and subranges that each
+    contain integers, and neither is checked.
+
+    With c=None it returns {c_upper, c_lower}, the smallest c in 0..4 for
+    each side, or False for a side that fails; with a given c it returns
+    the verdict for `side` ("upper" or "lower"), the form stored in
+    certificates.
+    """
+    bound = f"({series.conjectured_upper_asymptotic_bound})"
+    upper = f"""Resolve[ForAll[{series.other_variables}, 
+            Implies[{series.conditions}, # <= 10^c*{bound}]], Reals] & /@ res1"""
+    lower = f"""Resolve[ForAll[{series.other_variables}, 
+            Implies[{series.conditions}, Total[res1] >= 10^(-c)*{bound}]], Reals]"""
+    if c is None:
+        result = f"""{{Catch[Do[If[AllTrue[{upper}, TrueQ], Throw[c]], {{c, 0, 4}}]; False],
+         Catch[Do[If[TrueQ[{lower}], Throw[c]], {{c, 0, 4}}]; False]}}"""
+    elif side == "upper":
+        result = f"Block[{{c = {c}}}, AllTrue[{upper}, TrueQ]]"
+    else:
+        result = f"Block[{{c = {c}}}, TrueQ[{lower}]]"
+    return SERIES_PRELUDE + f"""
+        res1 = Flatten@{series_estimates(series, response, reduced)};
+
+        {result}
+        """
+
+
+def verify_two_sided(series: series_to_bound, response: str) -> bool:
+    """Check series << bound, and bound << series on the estimates, for the breakpoints `response`.
+
+    Both sides are decided in one kernel session, on estimates computed
+    once. Only the upper bound is proved, so the certificate is an ordinary
+    one-sided certificate holding the upper check; the lower side is
+    evidence (see `two_sided_query`) and is only printed.
+    """
+    from kernels import run_parallel
+    from mathematica_export import wl_list
+
+    print(response)
+    reduced = _reduce_subranges(series, split_top_level(response[1:-1]))
+    out = run_parallel([two_sided_query(series, response, reduced)], jobs=1)[0] or ""
+    upper, lower = wl_list(out, 2)
+    print(f'  upper bound: {"verified with C = 10^" + upper if upper.isdigit() else upper}')
+    print(f'  lower bound: {"holds for the estimates with C = 10^-" + lower if lower.isdigit() else lower}')
+    if not (upper.isdigit() and lower.isdigit()):
+        print('Not verified')
+        return False
+
+    print('Upper bound verified; lower bound holds for the integral estimates (evidence, not certified)')
+    points = split_top_level(response[1:-1])
+    checks = [Check(region=f'upper bound on {response}', constant=int(upper),
+                    query=two_sided_query(series, response, reduced, int(upper), 'upper'), verdict='True')]
+    cert = ProofCertificate(kind="series", problem=asdict(series), decomposition=points, checks=checks)
+    print(f'Certificate of the upper bound written to {save(cert)}')
+    return True
+
+
+@dataclass
+class SubrangeVerdict:
+    lower: str
+    upper: str
+    # "True", "False" (fails for every C up to 10^4), "Cancelled", or the raw CAS output
+    verdict: str
+    constant: Optional[int] = None
+    query: str = ""
+
+
+def verify_subranges(
+    series: series_to_bound,
+    response: str,
+    *,
+    known: Optional[Dict[Tuple[str, str], SubrangeVerdict]] = None,
+    jobs: Optional[int] = None,
+) -> List[SubrangeVerdict]:
+    """Verify every subrange of `response` as an independent kernel job.
+
+    Jobs run in parallel and stop at the first subrange that fails for every
+    C up to 10^4. Subranges already verified in `known` (keyed by their
+    canonical end points) are not re-run; new successes are added to it.
+    """
+    from kernels import run_parallel
+
+    points = split_top_level(response[1:-1])
+    reduced = _reduce_subranges(series, points)
+    if reduced is not None:
+        decided = sum(r.decided for r in reduced)
+        total = decided + sum(r.undecided for r in reduced)
+        print(f'Leading summands decided in Python: {decided}/{total}')
+    pairs = list(zip(points, points[1:]))
+    keys = [(canonical_atom(lo), canonical_atom(hi)) for lo, hi in pairs]
+    known = {} if known is None else known
+
+    todo = [i for i, key in enumerate(keys) if key not in known]
+    codes = [subrange_query(series, *pairs[i], None if reduced is None else [reduced[i]]) for i in todo]
+    outputs = run_parallel(codes, jobs=jobs, stop=lambda out: out == "False")
+
+    verdicts: Dict[int, SubrangeVerdict] = {}
+    for i, out in zip(todo, outputs):
+        lo, hi = pairs[i]
+        if out is None:
+            verdicts[i] = SubrangeVerdict(lo, hi, "Cancelled")
+        elif re.fullmatch(r"\d+", out):
+            c = int(out)
+            query = subrange_query(series, lo, hi, None if reduced is None else [reduced[i]], c)
+            verdicts[i] = known[keys[i]] = SubrangeVerdict(lo, hi, "True", c, query)
         else:
-            count+=1
-            print('Not verified')
-    if count ==5:
-        print('Try prompting the LLM again. The verification has failed up to a positive constant C = 10^4')
+            verdicts[i] = SubrangeVerdict(lo, hi, out)
+    return [verdicts[i] if i in verdicts else known[keys[i]] for i in range(len(pairs))]
+
+
+def ask_llm_series(series: series_to_bound, attempts: int = 2, two_sided: bool = False) -> bool:
+    known: Dict[Tuple[str, str], SubrangeVerdict] = {}
+    if two_sided:
+        verify = lambda response: verify_two_sided(series, response)
+    else:
+        verify = lambda response: verify_breakpoints(series, response, known=known)
+    for similarity, points in RetrievalIndex.open().nearest("series", series):
+        print(f'Trying stored breakpoints of a similar series (similarity {similarity:.2f})')
+        if verify('{'+', '.join(points)+'}'):
+            return True
+
+    for _ in range(attempts):
+        # Non-consensus answers are tried too; `known` makes shared subranges free
+        candidates = propose_breakpoint_candidates(series)
+        if not candidates:
+            return False
+        for response in candidates:
+            if verify(response):
+                return True
+    print('Try prompting the LLM again. The verification has failed up to a positive constant C = 10^4')
+    return False
+
+
+def verify_breakpoints(series: series_to_bound, response: str, known=None) -> bool:
+    """Verify the estimate on the subranges given by `response` for C = 10^0..10^4.
+
+    Prints a verdict per subrange, stores a certificate and returns True on
+    success. `known` is passed on to `verify_subranges`.
+    """
+    print(response)
+    verdicts = verify_subranges(series, response, known=known)
+    for v in verdicts:
+        detail = f'verified with C = 10^{v.constant}' if v.verdict == 'True' else v.verdict
+        print(f'  {v.lower} < {series.summation_index} < {v.upper}: {detail}')
+    if not all(v.verdict == 'True' for v in verdicts):
+        failed = [f'({v.lower}, {v.upper})' for v in verdicts if v.verdict not in ('True', 'Cancelled')]
+        print(f'Not verified. Failing subranges: {", ".join(failed) or "none definite"}')
+        return False
+
+    print('All estimates verified')
+    cert = ProofCertificate(
+        kind="series",
+        problem=asdict(series),
+        decomposition=split_top_level(response[1:-1]),
+        checks=[Check(region=f'{v.lower} < {series.summation_index} < {v.upper}', constant=v.constant, query=v.query, verdict='True') for v in verdicts],
+    )
+    print(f'Certificate written to {save(cert)}')
+    return True
     
 series_1 = series_to_bound(formula = "(2*d+1)/(2*h^2*(1+d*(d+1)/(h^2))(1+d*(d+1)/(h^2*m^2))^2)", conditions = "h >1 && m > 1", summation_index="d", other_variables="{h,m}", summation_bounds=["0","Infinity"], conjectured_upper_asymptotic_bound="1+Log[m^2]")
 
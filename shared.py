@@ -1,15 +1,109 @@
-# requirements: sympy, cvc5
-from dataclasses import dataclass
+import threading
+import weakref
 from typing import List, Dict, Iterable, Optional, Union, Any
-import sympy as sp
-from sympy.parsing.sympy_parser import parse_expr
-from sympy import symbols
 
-import cvc5
-from cvc5 import Kind
+_TERMS: "weakref.WeakValueDictionary" = weakref.WeakValueDictionary()
+_TERMS_LOCK = threading.Lock()
 
-@dataclass
 class Term:
-    rel: str
-    lhs : Any
-    rhs : Any    
\ No newline at end of file
+    """An atomic fact rel(lhs, rhs), e.g. BigO(m, n).
+
+    Terms are immutable and interned: constructing the same (rel, lhs, rhs)
+    twice returns the same object, so equality is identity and they can be
+    used directly as set members and dict keys by the derivation engine.
+    """
+    __slots__ = ("rel", "lhs", "rhs", "__weakref__")
+
+    def __new__(cls, rel: str, lhs: Any, rhs: Any) -> "Term":
+        key = (rel, lhs, rhs)
+        with _TERMS_LOCK:
+            term = _TERMS.get(key)
+            if term is None:
+                term = object.__new__(cls)
+                object.__setattr__(term, "rel", rel)
+                object.__setattr__(term, "lhs", lhs)
+                object.__setattr__(term, "rhs", rhs)
+                _TERMS[key] = term
+        return term
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Term is immutable")
+
+    def __reduce__(self):
+        return (Term, (self.rel, self.lhs, self.rhs))
+
+    def __repr__(self) -> str:
+        return f"Term(rel={self.rel!r}, lhs={self.lhs!r}, rhs={self.rhs!r})"
+
+    def __str__(self) -> str:
+        return f"{self.rel}({self.lhs},{self.rhs})"
+
+
+def split_top_level(text: str, sep: str = ",") -> List[str]:
+    """Split `text` on `sep`, ignoring separators nested inside (), [] or {}.
+
+    Used for Mathematica lists such as "{0, h, Log[h, m], Infinity}" where a
+    naive `split(',')` would break function arguments apart; `sep` may be
+    longer than one character (e.g. "&&").
+    """
+    parts: List[str] = []
+    depth = 0
+    current = ""
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth -= 1
+        if depth == 0 and text.startswith(sep, i):
+            parts.append(current.strip())
+            current = ""
+            i += len(sep)
+            continue
+        current += ch
+        i += 1
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+def _parenthesized(text: str) -> bool:
+    """True if `text` is one pair of parentheses around everything else."""
+    if not (text.startswith("(") and text.endswith(")")):
+        return False
+    depth = 0
+    for i, ch in enumerate(text):
+        if ch in "([{":
+            depth += 1
+        elif ch in ")]}":
+            depth -= 1
+        if depth == 0 and i < len(text) - 1:
+            return False
+    return True
+
+
+def split_conditions(text: str) -> List[str]:
+    """Atoms of a conjunction of conditions given as a WL list and/or with &&.
+
+    "{x>0, (y>=x && z>=y) && (True)}" -> ["x>0", "y>=x", "z>=y"]: only
+    top-level separators split, redundant parentheses are dropped and
+    "True" atoms are skipped.
+    """
+    text = text.strip()
+    if text.startswith("{") and text.endswith("}"):
+        text = text[1:-1]
+    atoms: List[str] = []
+    for part in split_top_level(text):
+        for atom in split_top_level(part, "&&"):
+            inner = atom
+            while _parenthesized(inner):
+                inner = inner[1:-1].strip()
+            if inner == "True":
+                continue
+            if inner != atom and len(split_conditions(inner)) != 1:
+                atoms.extend(split_conditions(inner))
+            elif inner:
+                # A disjunction keeps its parentheses
+                atoms.append(atom if "||" in inner else inner)
+    return atoms
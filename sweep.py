@@ -0,0 +1,195 @@
+"""Prove a family of estimates that differ only in the value of one parameter.
+
+A template is an ordinary `question` or `series_to_bound` in which a symbol
+(say `a`) stands for the parameter, e.g. `lhs="x^a*y"`. The family is
+decomposed once, on its first member; the per-member checks are then sent
+to a single kernel as one list, so the kernel start-up and the prelude are
+paid once per batch instead of once per member. Only the members whose
+checks fail get a decomposition of their own.
+"""
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, List
+
+from certificates import Check, ProofCertificate, save
+from mathematica_export import (
+    WITNESS_BIGO,
+    propose_subdomains,
+    question,
+    region_conditions,
+    wl_eval,
+    witness_call,
+    witness_query,
+    wl_list,
+)
+from series_summation import (
+    SERIES_PRELUDE,
+    propose_breakpoints,
+    series_estimates,
+    series_query,
+    series_to_bound,
+)
+from shared import split_top_level
+
+__all__ = ["SweepMember", "instantiate", "sweep_question", "sweep_series", "print_table"]
+
+
+@dataclass
+class SweepMember:
+    value: str
+    problem: Any
+    decomposition: List[str] = field(default_factory=list)
+    verdicts: List[str] = field(default_factory=list)
+    constant: int = 0
+    redecomposed: bool = False
+
+    @property
+    def proved(self) -> bool:
+        return bool(self.verdicts) and all(v == "True" for v in self.verdicts)
+
+
+def instantiate(template: Any, param: str, value: str) -> Any:
+    """Copy of `template` with every occurrence of the symbol `param` replaced by `value`."""
+    pattern = re.compile(rf"(?<![A-Za-z0-9$]){re.escape(param)}(?![A-Za-z0-9$])")
+
+    def sub(v: Any) -> Any:
+        if isinstance(v, str):
+            return pattern.sub(f"({value})", v)
+        if isinstance(v, list):
+            return [sub(x) for x in v]
+        return v
+
+    return type(template)(**{k: sub(v) for k, v in asdict(template).items()})
+
+
+def _question_batch(members: List[SweepMember], c: int, evaluate: Callable[[str], str]) -> None:
+    calls = [
+        witness_call(m.problem.variables, region_conditions(m.problem, r), m.problem.lhs, m.problem.rhs, c)
+        for m in members
+        for r in m.decomposition
+    ]
+    if not calls:
+        return
+    verdicts = wl_list(evaluate(WITNESS_BIGO + "\n{" + ",\n".join(calls) + "}"), len(calls))
+    i = 0
+    for m in members:
+        m.verdicts = verdicts[i:i + len(m.decomposition)]
+        m.constant = c
+        i += len(m.decomposition)
+
+
+def _save_question(m: SweepMember) -> None:
+    q = m.problem
+    checks = [
+        Check(region=region_conditions(q, r), constant=m.constant,
+              query=witness_query(q.variables, region_conditions(q, r), q.lhs, q.rhs, m.constant), verdict=v)
+        for r, v in zip(m.decomposition, m.verdicts)
+    ]
+    save(ProofCertificate(kind="question", problem=asdict(q), decomposition=m.decomposition, checks=checks))
+
+
+def sweep_question(
+    template: question,
+    param: str,
+    values: List[str],
+    *,
+    c: int = 0,
+    evaluate: Callable[[str], str] = wl_eval,
+) -> List[SweepMember]:
+    members = [SweepMember(value=v, problem=instantiate(template, param, v)) for v in values]
+    if not members:
+        return members
+    shared_regions = propose_subdomains(members[0].problem)
+    for m in members:
+        m.decomposition = list(shared_regions)
+    _question_batch(members, c, evaluate)
+
+    for m in members:
+        if m.proved:
+            continue
+        print(f"{param} = {m.value}: shared decomposition failed, asking for a new one")
+        m.decomposition = propose_subdomains(m.problem)
+        m.redecomposed = True
+        _question_batch([m], c, evaluate)
+
+    for m in members:
+        if m.proved:
+            _save_question(m)
+    return members
+
+
+def _series_batch(members: List[SweepMember], c: int, evaluate: Callable[[str], str]) -> None:
+    blocks = []
+    for m in members:
+        s = m.problem
+        points = "{" + ", ".join(m.decomposition) + "}"
+        blocks.append(f"""Module[{{res1, res2}},
+        res1 = Flatten@{series_estimates(s, points)};
+        res2 = Resolve[ForAll[{s.other_variables},
+            Implies[{s.conditions}, # <= 10^{c}*({s.conjectured_upper_asymptotic_bound})]], Reals] & /@ res1;
+        AllTrue[res2, TrueQ]]""")
+    if not blocks:
+        return
+    verdicts = wl_list(evaluate(SERIES_PRELUDE + "\n{" + ",\n".join(blocks) + "}"), len(blocks))
+    for m, v in zip(members, verdicts):
+        m.verdicts = [v]
+        m.constant = c
+
+
+def _verify_series(members: List[SweepMember], evaluate: Callable[[str], str]) -> None:
+    # Same constants as ask_llm_series: C = 10^0, ..., 10^4
+    pending = [m for m in members if m.decomposition]
+    for c in range(5):
+        if not pending:
+            break
+        _series_batch(pending, c, evaluate)
+        pending = [m for m in pending if not m.proved]
+
+
+def _breakpoints(s: series_to_bound) -> List[str]:
+    response = propose_breakpoints(s)
+    return split_top_level(response[1:-1]) if response else []
+
+
+def sweep_series(
+    template: series_to_bound,
+    param: str,
+    values: List[str],
+    *,
+    evaluate: Callable[[str], str] = wl_eval,
+) -> List[SweepMember]:
+    members = [SweepMember(value=v, problem=instantiate(template, param, v)) for v in values]
+    if not members:
+        return members
+    points = _breakpoints(members[0].problem)
+    for m in members:
+        m.decomposition = list(points)
+    _verify_series(members, evaluate)
+
+    for m in members:
+        if m.proved:
+            continue
+        print(f"{param} = {m.value}: shared breakpoints failed, asking for new ones")
+        m.decomposition = _breakpoints(m.problem)
+        m.redecomposed = True
+        _verify_series([m], evaluate)
+
+    for m in members:
+        if m.proved:
+            points = "{" + ", ".join(m.decomposition) + "}"
+            query = series_query(m.problem, points, m.constant)
+            save(ProofCertificate(
+                kind="series",
+                problem=asdict(m.problem),
+                decomposition=m.decomposition,
+                checks=[Check(region=points, constant=m.constant, query=query, verdict="True")],
+            ))
+    return members
+
+
+def print_table(param: str, members: List[SweepMember]) -> None:
+    width = max([len(param)] + [len(m.value) for m in members])
+    for m in members:
+        status = "proved" if m.proved else "not proved"
+        note = " (own decomposition)" if m.redecomposed else ""
+        print(f"  {param} = {m.value:<{width}}  {status}, C = 10^{m.constant}{note}")
@@ -0,0 +1,270 @@
+"""Symmetry reductions applied before a problem is decomposed and verified.
+
+Quantifier elimination gets much slower with every extra variable, and many
+estimates are invariant under a scaling x_i -> t^w_i * x_i (t > 0): AM-GM in
+`question_2` is unchanged by x, y, z -> t*x, t*y, t*z. If lhs and rhs scale
+with the same power of t and every condition of the region is preserved,
+any point with x_k > 0 (w_k != 0) can be moved to one with x_k = 1 without
+changing the truth of lhs <= C*rhs, so x_k is dropped from the query.
+
+Candidate weights are screened numerically and the chosen one is confirmed
+with sympy; anything that cannot be parsed or confirmed is left unreduced.
+
+Likewise, if lhs, rhs and the domain are unchanged by swapping two
+variables, every transposition within a class of such variables is a
+symmetry, and only the ordered chamber (e.g. x <= y <= z) needs to be
+decomposed and verified; the other n! - 1 chambers are its images.
+"""
+import math
+import random
+import re
+from dataclasses import dataclass
+from fractions import Fraction
+from functools import lru_cache
+from itertools import product
+from typing import Dict, List, Optional, Tuple
+
+import sympy as sp
+
+from dominance import to_sympy
+from shared import split_conditions, split_top_level
+
+__all__ = ["ScalingReduction", "scaling_reduction", "substitute", "Chamber", "symmetric_chamber"]
+
+_T = sp.Symbol("t", positive=True)
+# Beyond this many variables only 0/1 weights are tried
+_MAX_WEIGHTED = 3
+
+
+@dataclass
+class ScalingReduction:
+    variable: str
+    weights: Dict[str, int]
+    variables: str
+    conditions: str
+    lhs: str
+    rhs: str
+
+    def describe(self) -> str:
+        scaling = ", ".join(
+            f"{v} -> t{'' if w == 1 else '^' + str(w)}*{v}" for v, w in self.weights.items() if w
+        )
+        return f"{self.variable} = 1 (invariant under {scaling})"
+
+
+def _names(text: str) -> List[str]:
+    text = text.strip()
+    if text.startswith("{") and text.endswith("}"):
+        text = text[1:-1]
+    return [v.strip() for v in split_top_level(text) if v.strip()]
+
+
+def _atoms(conds: str) -> List[str]:
+    return split_conditions(conds)
+
+
+def substitute(text: str, name: str, value: str) -> str:
+    """Replace the symbol `name` in a WL expression by `(value)`."""
+    pattern = re.compile(rf"(?<![A-Za-z0-9$]){re.escape(name)}(?![A-Za-z0-9$])")
+    return pattern.sub(f"({value})", text)
+
+
+def _is_positivity(atom: str, name: str) -> bool:
+    n = re.escape(name)
+    return re.fullmatch(rf"\s*(?:{n}\s*>\s*0|0\s*<\s*{n})\s*", atom) is not None
+
+
+def _weights(n: int):
+    values = (0, 1, -1, 2) if n <= _MAX_WEIGHTED else (0, 1)
+    out = []
+    for w in product(values, repeat=n):
+        nonzero = [x for x in w if x]
+        # w and -w describe the same symmetry
+        if nonzero and nonzero[0] > 0:
+            out.append(w)
+    out.sort(key=lambda w: (-sum(1 for x in w if x), sum(abs(x) for x in w)))
+    return out
+
+
+@lru_cache(maxsize=1024)
+def _parsed(text: str, names: Tuple[str, ...], positive: Tuple[str, ...]) -> sp.Basic:
+    symbols = {
+        sp.Symbol(n): sp.Symbol(n, positive=True) if n in positive else sp.Symbol(n, real=True)
+        for n in names
+    }
+    return to_sympy(text).xreplace(symbols)
+
+
+def _numeric_degree(expr: sp.Expr, names: Tuple[str, ...], weights: Tuple[int, ...]) -> Optional[float]:
+    """Exponent a with expr(t^w x) = t^a expr(x) at a few random points, or None."""
+    if expr == 0:
+        return 0.0
+    symbols = sorted(expr.free_symbols, key=lambda s: s.name)
+    if any(s.name not in names for s in symbols):
+        return None
+    w = {n: wt for n, wt in zip(names, weights)}
+    try:
+        f = sp.lambdify(symbols, expr, "math")
+        rng = random.Random(0)
+        degree = None
+        for _ in range(2):
+            point = [rng.uniform(0.5, 3.0) for _ in symbols]
+            base = f(*point)
+            if not isinstance(base, float) or base == 0 or not math.isfinite(base):
+                return None
+            for t in (1.7, 2.9):
+                scaled = f(*[p * t ** w[s.name] for p, s in zip(point, symbols)])
+                ratio = scaled / base
+                if not ratio > 0:
+                    return None
+                a = math.log(ratio) / math.log(t)
+                if degree is None:
+                    degree = a
+                elif abs(a - degree) > 1e-8 * max(1.0, abs(degree)):
+                    return None
+        return degree
+    except (ArithmeticError, ValueError, TypeError, OverflowError):
+        return None
+
+
+def _confirm(expr: sp.Expr, names: Tuple[str, ...], weights: Tuple[int, ...], degree: float) -> bool:
+    a = Fraction(degree).limit_denominator(24)
+    if abs(float(a) - degree) > 1e-8:
+        return False
+    scale = {s: _T ** w * s for s in expr.free_symbols for n, w in zip(names, weights) if s.name == n and w}
+    diff = sp.simplify(expr.xreplace(scale) - _T ** sp.Rational(a.numerator, a.denominator) * expr)
+    return diff == 0
+
+
+def _invariant(
+    relations: List[sp.Basic],
+    lhs: sp.Expr,
+    rhs: sp.Expr,
+    names: Tuple[str, ...],
+    weights: Tuple[int, ...],
+    confirm: bool,
+) -> bool:
+    check = _confirm if confirm else (lambda e, n, w, d: True)
+    dl, dr = _numeric_degree(lhs, names, weights), _numeric_degree(rhs, names, weights)
+    if dl is None or dr is None or abs(dl - dr) > 1e-8 * max(1.0, abs(dl)):
+        return False
+    if not (check(lhs, names, weights, dl) and check(rhs, names, weights, dr)):
+        return False
+    for rel in relations:
+        a, b = rel.lhs, rel.rhs
+        da, db = _numeric_degree(a, names, weights), _numeric_degree(b, names, weights)
+        if da is None or db is None:
+            return False
+        # A side that is 0 keeps any sign condition scaling-invariant
+        if a != 0 and b != 0 and abs(da - db) > 1e-8 * max(1.0, abs(da)):
+            return False
+        if not (check(a, names, weights, da) and check(b, names, weights, db)):
+            return False
+    return True
+
+
+def scaling_reduction(variables: str, conds: str, lhs: str, rhs: str) -> Optional[ScalingReduction]:
+    """Fix one positive variable to 1 if the region and the estimate are scaling invariant."""
+    names = tuple(_names(variables))
+    atoms = _atoms(conds)
+    if len(names) < 2 or any("||" in a or "!" in a for a in atoms):
+        return None
+    positive = tuple(n for n in names if any(_is_positivity(a, n) for a in atoms))
+    if not positive:
+        return None
+    try:
+        relations = [_parsed(a, names, positive) for a in atoms]
+        # x > 0 itself simplifies to True once x is declared positive
+        relations = [r for r in relations if r is not sp.true]
+        if not all(isinstance(r, sp.core.relational.Relational) for r in relations):
+            return None
+        lhs_e, rhs_e = _parsed(lhs, names, positive), _parsed(rhs, names, positive)
+    except Exception:
+        return None
+
+    for weights in _weights(len(names)):
+        pivot = next((n for n, w in zip(names, weights) if w and n in positive), None)
+        if pivot is None:
+            continue
+        if not _invariant(relations, lhs_e, rhs_e, names, weights, confirm=False):
+            continue
+        try:
+            if not _invariant(relations, lhs_e, rhs_e, names, weights, confirm=True):
+                continue
+        except Exception:
+            continue
+        kept = [substitute(a, pivot, "1") for a in atoms if not _is_positivity(a, pivot)]
+        return ScalingReduction(
+            variable=pivot,
+            weights=dict(zip(names, weights)),
+            variables="{" + ", ".join(n for n in names if n != pivot) + "}",
+            conditions=", ".join(kept),
+            lhs=substitute(lhs, pivot, "1"),
+            rhs=substitute(rhs, pivot, "1"),
+        )
+    return None
+
+
+@dataclass
+class Chamber:
+    # classes of interchangeable variables, each in the order of `variables`
+    classes: List[List[str]]
+
+    @property
+    def conditions(self) -> List[str]:
+        return [f"{a}<={b}" for cls in self.classes for a, b in zip(cls, cls[1:])]
+
+    @property
+    def condition(self) -> str:
+        return " && ".join(self.conditions)
+
+    def describe(self) -> str:
+        chains = ", ".join("<=".join(cls) for cls in self.classes)
+        return f"chamber {chains} (symmetric in " + "; ".join(", ".join(cls) for cls in self.classes) + ")"
+
+
+def _swap_invariant(exprs: List[sp.Expr], relations: List[sp.Basic], a: sp.Symbol, b: sp.Symbol) -> bool:
+    swap = {a: b, b: a}
+    for e in exprs:
+        if sp.simplify(e.xreplace(swap) - e) != 0:
+            return False
+    return {r.xreplace(swap).canonical for r in relations} == {r.canonical for r in relations}
+
+
+def symmetric_chamber(variables: str, domain: str, lhs: str, rhs: str) -> Optional[Chamber]:
+    """Classes of variables that lhs, rhs and `domain` are symmetric in, or None."""
+    names = _names(variables)
+    atoms = _atoms(domain)
+    if len(names) < 2 or any("||" in a or "!" in a for a in atoms):
+        return None
+    try:
+        exprs = [to_sympy(lhs), to_sympy(rhs)]
+        relations = [to_sympy(a) for a in atoms]
+    except Exception:
+        return None
+    if not all(isinstance(r, sp.core.relational.Relational) for r in relations):
+        return None
+
+    # Transpositions that are symmetries generate the full symmetric group
+    # on each connected class, so a union-find over the pairs is enough.
+    parent = {n: n for n in names}
+
+    def find(n: str) -> str:
+        while parent[n] != n:
+            n = parent[n]
+        return n
+
+    for i, a in enumerate(names):
+        for b in names[i + 1:]:
+            if find(a) == find(b):
+                continue
+            try:
+                if _swap_invariant(exprs, relations, sp.Symbol(a), sp.Symbol(b)):
+                    parent[find(b)] = find(a)
+            except Exception:
+                continue
+    classes: Dict[str, List[str]] = {}
+    for n in names:
+        classes.setdefault(find(n), []).append(n)
+    nontrivial = [cls for cls in classes.values() if len(cls) > 1]
+    return Chamber(classes=nontrivial) if nontrivial else None
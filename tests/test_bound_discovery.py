@@ -0,0 +1,25 @@
+import math
+
+from bound_discovery import _multiple_of, fit_bounds
+from dominance import to_sympy
+
+
+def _best(names, atoms, f, **kw):
+    return [fit.bound for fit in fit_bounds(names, atoms, f, **kw) if fit.bounded_above and fit.bounded_below]
+
+
+def test_thirds_are_on_the_lattice():
+    f = lambda x, y, z: (x * y * z) ** (1 / 3)
+    assert _best(["x", "y", "z"], ["x>0", "y>0", "z>0"], f)[0] == "x^(1/3)*y^(1/3)*z^(1/3)"
+    assert "x^(1/3)*y^(1/3)*z^(1/3)" not in _best(["x", "y", "z"], ["x>0", "y>0", "z>0"], f, denominators=(2,))
+
+
+def test_halves_still_fit():
+    assert _best(["x"], ["x>1"], lambda x: math.sqrt(x) * 5)[0] == "x^(1/2)"
+
+
+def test_multiples_of_the_lhs_are_recognised():
+    names = ["x", "y", "z"]
+    assert _multiple_of("x^(1/3)*y^(1/3)*z^(1/3)", to_sympy("(x*y*z)^(1/3)"), names)
+    assert _multiple_of("x*y", to_sympy("2*x*y"), names)
+    assert not _multiple_of("x*y*(1+Log[y])", to_sympy("x*y"), names)
@@ -0,0 +1,77 @@
+import os
+import threading
+
+from certificates import Check, ProofCertificate, load, load_all, recheck, save
+
+PROBLEM = {
+    "variables": "{x,y}",
+    "domain_description": "{x>0, y>1}",
+    "lhs": "x*y",
+    "rhs": "y*Log[y]+Exp[x]",
+}
+
+
+def _cert(**kw):
+    checks = [Check(region="x>0, y>1, x<=Log[y]", constant=0, query="witnessBigO[...]", verdict="True")]
+    return ProofCertificate(kind="question", problem=dict(PROBLEM), decomposition=["x<=Log[y]"], checks=checks, **kw)
+
+
+def test_round_trip(tmp_path):
+    cert = _cert()
+    save(cert, str(tmp_path))
+    [loaded] = load_all(str(tmp_path))
+    assert loaded == cert
+    assert loaded.proved
+
+
+def test_concurrent_saves_of_one_key(tmp_path):
+    errors = []
+
+    def run():
+        try:
+            for _ in range(20):
+                save(_cert(), str(tmp_path))
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert [n for n in os.listdir(tmp_path) if n.endswith(".tmp")] == []
+    assert len(load_all(str(tmp_path))) == 1
+
+
+def test_two_sided_certificate_has_its_own_key(tmp_path):
+    one, two = _cert(), _cert(two_sided=True)
+    assert one.key != two.key
+    save(one, str(tmp_path))
+    save(two, str(tmp_path))
+    assert sorted(c.two_sided for c in load_all(str(tmp_path))) == [False, True]
+
+
+def test_two_sided_certificate_serves_one_sided_load(tmp_path):
+    save(_cert(two_sided=True), str(tmp_path))
+    assert load("question", PROBLEM, str(tmp_path)).two_sided
+    assert load("question", PROBLEM, str(tmp_path), two_sided=True).two_sided
+    assert load("question", {**PROBLEM, "rhs": "x"}, str(tmp_path)) is None
+
+
+def test_recheck_replays_local_verifiers_instead_of_resolve():
+    local = Check(region="0<x<1", constant=0, query="q-local", verdict="True",
+                  verifier="interval", verifier_args=["{x}", "x>0, x<1", "x^2", "2"])
+    legacy = Check(region="0<x<1", constant=0, query="q-legacy", verdict="True", verifier="interval arithmetic, 3 boxes")
+    cas = Check(region="x>1", constant=0, query="q-cas", verdict="True")
+    cert = _cert()
+    cert.checks = [local, legacy, cas]
+    sent = []
+
+    def evaluate(query):
+        sent.append(query)
+        return "False"
+
+    [(_, verdicts)] = recheck([cert], evaluate=evaluate)
+    assert verdicts == ["True", "False", "False"]
+    assert sorted(sent) == ["q-cas", "q-legacy"]
@@ -0,0 +1,33 @@
+from consensus import canonical_atom, canonical_breakpoints, canonical_regions, vote
+
+
+def test_atoms_are_oriented():
+    assert canonical_atom("y > x") == canonical_atom("x<y")
+    assert canonical_atom("x >= 2") == canonical_atom("2 <= x") == "2<=x"
+
+
+def test_equivalent_region_lists_agree():
+    a = canonical_regions("[x <= Log[y] && y > 1, x > Log[y]]", ["y>1"])
+    b = canonical_regions("{Log[y] < x, (y > 1 && Log[y] >= x)}", ["y>1"])
+    assert a == b
+
+
+def test_region_that_restates_the_domain_is_true():
+    assert canonical_regions("[x > 0]", ["x>0"]) == "[True]"
+
+
+def test_breakpoints_keep_their_order():
+    assert canonical_breakpoints("[0, h, Infinity]") == "[0, h, Infinity]"
+
+
+def test_vote_stops_at_k_and_ignores_empty_samples():
+    samples = iter(["", "[x<1, x>=1]", "[x>=1, x<1]", "[x<2, x>=2]"])
+    result = vote(lambda: next(samples), k=2, n=10)
+    assert result.reached and result.votes == 2 and result.samples == 3
+    assert result.raw == "[x<1, x>=1]"
+
+
+def test_vote_without_agreement_is_not_reached():
+    samples = iter(["[x<1, x>=1]", "[x<2, x>=2]"])
+    result = vote(lambda: next(samples), k=2, n=2)
+    assert result is not None and not result.reached
@@ -0,0 +1,78 @@
+import sympy as sp
+
+from dominance import dominant_reduction, dominates, leading_summand, parse_facts, reduced_form, to_sympy
+
+
+def _dominates(t, s, assumptions):
+    return dominates(to_sympy(t), to_sympy(s), parse_facts(assumptions))
+
+
+def test_generator_constant_for_fractional_lower_bound():
+    facts = parse_facts("x > 1/2")
+    assert facts.generators == [(sp.Integer(2), {sp.Symbol("x"): 1})]
+
+
+def test_fractional_lower_bound_does_not_prove_too_much():
+    assert _dominates("x", "1", "x > 1/2") is None
+    assert _dominates("d", "h", "d > h/2 && h > 0 && d > 0") is None
+
+
+def test_non_unit_lower_bound_proves_what_it_should():
+    assert _dominates("x", "2", "x > 2") is True
+    assert _dominates("x", "3", "x > 2") is None
+    assert _dominates("d", "h", "d > 2*h && h > 0 && d > 0") is True
+    assert _dominates("d", "2*h", "d > 2*h && h > 0 && d > 0") is True
+    assert _dominates("d", "3*h", "d > 2*h && h > 0 && d > 0") is None
+
+
+def test_products_of_generators():
+    assert _dominates("d^2", "h*m", "d > h && d > m && h > 1 && m > 1 && d > 1") is True
+    assert _dominates("d^2", "4*h*m", "d > 2*h && d > 2*m && h > 1 && m > 1 && d > 1") is True
+    assert _dominates("d^2", "5*h*m", "d > 2*h && d > 2*m && h > 1 && m > 1 && d > 1") is None
+
+
+def test_identical_monomials_compare_coefficients():
+    assert _dominates("2*x", "x", "x > 0") is True
+    assert _dominates("x", "2*x", "x > 0") is False
+
+
+def test_logs_and_exponentials():
+    assert _dominates("x*Log[x]", "Log[x]", "x > 1") is True
+    assert _dominates("Exp[x]", "Exp[x/2]", "x > 0") is True
+    assert _dominates("Exp[x/2]", "Exp[x]", "x > 0") is None
+
+
+def test_leading_summand():
+    facts = parse_facts("d > h && h > 1 && d > 1")
+    assert leading_summand(to_sympy("d^2 + d*h + h"), facts) == to_sympy("d^2")
+    assert leading_summand(to_sympy("d + 1"), parse_facts("d > 1/2")) is None
+
+
+def test_reduced_form_leaves_undecided_factors_to_mathematica():
+    form = reduced_form("1/(1 + d/h)", "d > h/2 && h > 0 && d > 0")
+    assert form.undecided == 1 and "LeadingSummand[" in form.wl
+    form = reduced_form("1/(1 + d/h)", "d > h && h > 0 && d > 0")
+    assert form.decided == 1 and "LeadingSummand" not in form.wl
+
+
+def test_generators_need_positive_symbols():
+    # y may be negative, so x > y and y^2 > z say nothing about x^2 / z
+    assert _dominates("x^2", "z", "x > 0 && z > 0 && x > y && y^2 > z") is None
+    assert parse_facts("x > 0 && x > y").generators == []
+    assert _dominates("x^2", "z", "x > 0 && y > 0 && z > 0 && x > y && y^2 > z") is True
+    # positivity follows along chains of positive monomials
+    assert _dominates("d", "h", "d > 2*h && h > 1") is True
+
+
+def test_dominant_reduction_keeps_the_right_rhs_summand_on_question_1():
+    domain = "x>0, y>1, "
+    for region, kept in [("x<=Log[y]", "y*Log[y]"), ("x<=1 && y>2", "y*Log[y]"),
+                         ("x>Log[y]", "Exp[x]"), ("x>2*Log[y]", "Exp[x]")]:
+        form = dominant_reduction("{x,y}", domain + region, "x*y", "y*Log[y]+Exp[x]")
+        assert (form.lhs, form.rhs) == ("x*y", kept), region
+
+
+def test_dominant_reduction_of_the_lhs_and_of_unsigned_summands():
+    form = dominant_reduction("{d,h}", "d > h && h > 1", "d^2 + d*h + h", "d^2")
+    assert form.lhs == "3*(d^2)" and form.rhs == "d^2"
+    assert dominant_reduction("{x,y}", "x > 0", "x", "x - y + 2") is None
@@ -0,0 +1,28 @@
+from entry import FactBase, Problem, solve
+from shared import Term
+
+
+def test_chains_and_conversions_are_closed_eagerly():
+    base = FactBase()
+    base.update([Term("Le", "a", "b"), Term("Ge", "c", "b"), Term("BigO", "c", "d")])
+    assert base.derives(Term("BigO", "a", "b"))
+    assert base.derives(Term("BigO", "b", "c"))
+    assert base.derives(Term("BigO", "a", "d"))
+    assert not base.derives(Term("BigO", "d", "a"))
+
+
+def test_facts_added_in_any_order_give_the_same_closure():
+    terms = [Term("BigO", "x", "y"), Term("BigO", "y", "z"), Term("BigO", "w", "x")]
+    one, two = FactBase(), FactBase()
+    one.update(terms)
+    two.update(reversed(terms))
+    assert one.facts == two.facts
+    assert Term("BigO", "w", "z") in one
+
+
+def test_explain_lists_premises_first():
+    steps = solve(Problem(conditions=[], given=["BigO(m,n)", "BigO(n,p)"], goal="?BigO(m,p)"))
+    assert steps[-1].startswith(str(Term("BigO", "m", "p")))
+    assert "Transitivity" in steps[-1]
+    assert len(steps) == 3
+    assert solve(Problem(conditions=[], given=["BigO(m,n)"], goal="?BigO(n,m)")) is None
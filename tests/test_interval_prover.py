@@ -0,0 +1,43 @@
+from fractions import Fraction
+
+from interval_prover import Interval, prove
+
+
+def _contains(iv, q):
+    return Fraction(iv.lo) <= q <= Fraction(iv.hi)
+
+
+def test_points_and_operations_enclose_the_exact_result():
+    third = Interval.point(Fraction(1, 3))
+    assert third.lo < third.hi and _contains(third, Fraction(1, 3))
+    assert Interval.point(Fraction(1, 2)) == (0.5, 0.5)
+    tenth = Interval.point(Fraction(1, 10))
+    assert _contains(tenth + tenth + tenth, Fraction(3, 10))
+    assert _contains(third * Interval.point(3), 1)
+    assert _contains(Interval.point(1) / Interval.point(3), Fraction(1, 3))
+
+
+def test_division_by_an_interval_around_zero_is_unbounded():
+    assert Interval.point(1) / Interval(-1.0, 1.0) == (float("-inf"), float("inf"))
+
+
+def test_even_powers_of_intervals_around_zero():
+    sq = Interval(-2.0, 1.0) ** 2
+    assert sq.lo == 0.0 and sq.hi >= 4.0
+
+
+def test_proves_true_estimates_on_bounded_regions():
+    assert prove("{x}", "x>0, x<1", "x^2", "2", budget=5).proved
+    assert prove("{x,y}", "x>1, x<2, y>1, y<2, x<y", "x", "2*y", budget=5).proved
+    assert prove("{x}", "x>0, x<1", "x*Exp[x]", "1", c=1, budget=5).proved
+
+
+def test_never_proves_false_estimates():
+    assert not prove("{x}", "x>0, x<2", "x^2", "1", budget=1).proved
+    assert not prove("{x}", "x>0, x<1", "x", "x/2", budget=1).proved
+
+
+def test_refuses_what_it_cannot_handle():
+    assert prove("{x}", "x>0", "x", "x+1", budget=1).reason == "unbounded region"
+    assert prove("{x}", "x>0, x<1 || x>2", "x", "1", budget=1).reason == "unsupported conditions"
+    assert prove("{x}", "x>0, x<1", "x", "2", budget=0).reason == "disabled"
@@ -0,0 +1,88 @@
+import importlib
+import sys
+import time
+
+import pytest
+
+from kernels import MEMORY_EXCEEDED, KernelScheduler
+
+# Stand-in for wolframscript: runs the little command language below instead
+# of Wolfram Language, and logs every start
+FAKE = '''#!{python}
+import os, re, sys, time
+code, cap = re.search(r"MemoryConstrained\\[\\((.*)\\), (\\d+), ", sys.argv[2]).groups()
+with open({log!r}, "a") as f:
+    f.write(code + "\\n")
+cmd, *args = code.split()
+if cmd == "echo":
+    print(args[0])
+elif cmd == "sleep":
+    time.sleep(float(args[0]))
+    print(args[1])
+elif cmd == "cap":
+    print(cap)
+elif cmd == "oom":
+    print("MemoryLimitExceeded")
+elif cmd == "oomonce":
+    if os.path.exists(args[0]):
+        print("ok")
+    else:
+        open(args[0], "w").close()
+        print("MemoryLimitExceeded")
+elif cmd == "hog":
+    block = bytearray(int(args[0]) * 2**20)
+    for i in range(0, len(block), 4096):
+        block[i] = 1
+    time.sleep(10)
+    print("survived")
+'''
+
+MB = 2**20
+
+
+@pytest.fixture
+def fake_kernel(tmp_path, monkeypatch):
+    log = tmp_path / "started.log"
+    script = tmp_path / "wolframscript"
+    script.write_text(FAKE.format(python=sys.executable, log=str(log)))
+    script.chmod(0o755)
+    monkeypatch.setenv("WOLFRAMSCRIPT", str(script))
+    mathematica_export = importlib.import_module("mathematica_export")
+    monkeypatch.setattr(mathematica_export, "WOLFRAMSCRIPT", str(script))
+    return lambda: log.read_text().splitlines() if log.exists() else []
+
+
+def test_outputs_come_back_in_input_order(fake_kernel):
+    scheduler = KernelScheduler(jobs=3, budget=3 * 128 * MB, poll=0.02)
+    assert scheduler.run(["sleep 0.3 a", "echo b", "sleep 0.1 c"]) == ["a", "b", "c"]
+
+
+def test_out_of_memory_requeues_and_halves_concurrency(fake_kernel, tmp_path):
+    scheduler = KernelScheduler(jobs=4, budget=4 * 128 * MB, poll=0.02)
+    assert scheduler.run([f"oomonce {tmp_path / 'flag'}", "echo x"]) == ["ok", "x"]
+    assert scheduler.concurrency == 2
+    # every later kernel gets the doubled cap
+    assert scheduler.run(["cap"]) == [str(2 * 128 * MB)]
+
+
+def test_out_of_memory_at_concurrency_one_is_reported(fake_kernel):
+    scheduler = KernelScheduler(jobs=1, budget=128 * MB, poll=0.02)
+    assert scheduler.run(["oom", "echo y"]) == [MEMORY_EXCEEDED, "y"]
+
+
+def test_kernels_above_their_cap_are_killed(fake_kernel):
+    scheduler = KernelScheduler(jobs=2, budget=2 * 64 * MB, poll=0.05)
+    start = time.monotonic()
+    assert scheduler.run(["hog 400"]) == [MEMORY_EXCEEDED]
+    assert scheduler.concurrency == 1
+    assert fake_kernel() == ["hog 400", "hog 400"]
+    assert time.monotonic() - start < 8
+
+
+def test_stop_cancels_running_and_pending_jobs(fake_kernel):
+    scheduler = KernelScheduler(jobs=2, budget=2 * 128 * MB, poll=0.02)
+    start = time.monotonic()
+    outputs = scheduler.run(["echo hit", "sleep 5 slow", "echo never"], stop=lambda text: text == "hit")
+    assert outputs == ["hit", None, None]
+    assert time.monotonic() - start < 3
+    assert "echo never" not in fake_kernel()
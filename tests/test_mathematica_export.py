@@ -0,0 +1,31 @@
+import os
+
+os.environ.setdefault("WOLFRAMSCRIPT", "/bin/true")
+
+import mathematica_export  # noqa: E402
+from mathematica_export import WITNESS_REDUCED, attempt_proof, reduced_call, witness_call  # noqa: E402
+
+
+def test_reduced_call_shares_the_arguments_of_witness_call():
+    call = reduced_call("{x,y}", "x>0, y>1, x<=Log[y]", "x*y", "y*log[y]+exp[x]", "x*y", "y*Log[y]", 0)
+    assert call == "witnessReduced[{x,y}, {x>0, y>1, x<=Log[y]}, x*y, y*Log[y]+Exp[x], x*y, y*Log[y], 0]"
+    full = witness_call("{x,y}", "x>0, y>1, x<=Log[y]", "x*y", "y*log[y]+exp[x]", 0)
+    assert call[len("witnessReduced["):].startswith(full[len("witnessBigO["):-len("0]")])
+
+
+def test_reduced_call_with_a_multi_digit_constant():
+    call = reduced_call("x", "x>1", "x", "x+1", "x", "x", 12)
+    assert call == "witnessReduced[{x}, {x>1}, x, x+1, x, x, 12]"
+
+
+def test_attempt_proof_sends_the_reduction_with_the_full_fallback(monkeypatch):
+    monkeypatch.setenv("DECOMP_INTERVAL_BUDGET", "0")
+    sent = []
+    monkeypatch.setattr(mathematica_export, "wl_eval", lambda code: sent.append(code) or "True")
+    checks = []
+    attempt_proof("{x,y}", "x>0, y>1, x>Log[y]", "x*y", "y*Log[y]+Exp[x]", checks=checks)
+    [query] = sent
+    assert WITNESS_REDUCED in query
+    assert "witnessReduced[{x,y}, {x>0, y>1, x>Log[y]}, x*y, y*Log[y]+Exp[x], x*y, Exp[x], 0]" in query
+    assert "If[reducedVerdict === True, True, witnessBigO[{x,y}, {x>0, y>1, x>Log[y]}, x*y, y*Log[y]+Exp[x], 0]]" in query
+    assert checks[0].query == query and "Exp[x]" in checks[0].reduction
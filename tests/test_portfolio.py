@@ -0,0 +1,24 @@
+from types import SimpleNamespace
+
+from portfolio import rank, verify_portfolio
+
+QUESTION_1 = SimpleNamespace(variables="{x,y}", domain_description="{x>0, y>1}", lhs="x*y", rhs="y*Log[y]+Exp[x]")
+
+
+def test_rank_puts_counterexamples_and_gaps_last():
+    ranked = rank(QUESTION_1, [("[x<=Log[y]]", 3), ("[x>0]", 1), ("[x<=Log[y], x>Log[y]]", 2)])
+    assert ranked[0].regions == ["x<=Log[y]", "x>Log[y]"]
+    assert ranked[0].uncovered == 0 and ranked[0].violations == 0
+    gap = next(c for c in ranked if c.regions == ["x<=Log[y]"])
+    assert gap.uncovered > 0
+
+
+def test_candidates_that_miss_the_domain_are_never_verified():
+    ranked = rank(QUESTION_1, [("[x<=Log[y]]", 3), ("[x<=Log[y], x>Log[y]]", 2)])
+    tried = []
+    assert verify_portfolio(ranked, lambda regions: tried.append(regions) or True).regions == ["x<=Log[y]", "x>Log[y]"]
+    assert tried == [["x<=Log[y]", "x>Log[y]"]]
+    gap = [c for c in ranked if c.uncovered]
+    tried.clear()
+    assert verify_portfolio(gap, lambda regions: tried.append(regions) or True) is None
+    assert tried == []
@@ -0,0 +1,63 @@
+import threading
+import time
+
+import pytest
+
+from rate_limit import RateLimiter, backoff, retryable
+
+
+class _HTTPError(Exception):
+    def __init__(self, code):
+        self.code = code
+
+
+def test_limiter_respects_the_deadline():
+    limiter = RateLimiter(rpm=1)
+    limiter.acquire()
+    with pytest.raises(TimeoutError):
+        limiter.acquire(deadline=time.monotonic() + 0.1)
+
+
+def test_pause_holds_every_caller_back():
+    limiter = RateLimiter()
+    limiter.pause(0.2)
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.15
+
+
+def test_backoff_and_retryable():
+    assert all(0 <= backoff(a, base=1, cap=4) <= 4 for a in range(10))
+    assert retryable(_HTTPError(429)) and retryable(_HTTPError(503)) and retryable(TimeoutError())
+    assert not retryable(_HTTPError(400)) and not retryable(ValueError())
+
+
+def test_threaded_calls_against_the_fake_server(monkeypatch):
+    llm_client = pytest.importorskip("llm_client")
+    from fake_llm_server import serve
+
+    server = serve(replies=["[x<=1, x>1]"], throttle=0.3, errors=0.1, retry_after=0, seed=3)
+    try:
+        monkeypatch.setattr(llm_client, "backoff", lambda attempt: 0.0)
+        monkeypatch.setattr(llm_client, "MAX_ATTEMPTS", 20)
+        llm_client.configure(api_key="fake", base_url=server.url)
+        replies, errors = [], []
+
+        def run():
+            try:
+                for _ in range(3):
+                    replies.append(llm_client.generate_text("decompose", timeout=30))
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+        threads = [threading.Thread(target=run) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        server.shutdown()
+    assert not errors
+    assert replies == ["[x<=1, x>1]"] * 12
+    assert server.stats["ok"] == 12
+    assert server.stats["throttled"] + server.stats["errors"] > 0
@@ -0,0 +1,70 @@
+import os
+import threading
+import time
+
+from certificates import Check, ProofCertificate, save
+from retrieval import RetrievalIndex
+from symmetry import Chamber
+
+STORED = {"variables": "{x,y}", "domain_description": "{x>2, y>3}", "lhs": "x*y", "rhs": "y*Log[y]+Exp[x]"}
+NEW = {"variables": "{a,b}", "domain_description": "{a>5, b>3}", "lhs": "a*b", "rhs": "b*Log[b]+Exp[a]"}
+
+
+def _cert(decomposition):
+    checks = [Check(region=r, constant=0, query="q", verdict="True") for r in decomposition]
+    return ProofCertificate(kind="question", problem=dict(STORED), decomposition=decomposition, checks=checks)
+
+
+def test_exact_match_gets_the_new_problems_constants(tmp_path):
+    save(_cert(["x<=2*Log[y]", "x>2*Log[y] && y<7"]), str(tmp_path))
+    [(score, regions)] = RetrievalIndex.open(str(tmp_path)).nearest("question", NEW)
+    assert score == 1.0
+    assert regions == ["a <= 5*Log[b]", "a > 5*Log[b] && b < 7"]
+
+
+def test_rewritten_certificate_is_reindexed(tmp_path):
+    cert = _cert(["x<=2*Log[y]", "x>2*Log[y]"])
+    save(cert, str(tmp_path))
+    RetrievalIndex.open(str(tmp_path))
+    cert.decomposition = ["x<=Log[y]", "x>Log[y]"]
+    cert.created = time.time() + 1
+    save(cert, str(tmp_path))
+    [(_, regions)] = RetrievalIndex.open(str(tmp_path)).nearest("question", NEW)
+    assert regions == ["a <= Log[b]", "a > Log[b]"]
+
+
+AM_GM = {"variables": "{x,y,z}", "domain_description": "{x>0, y>0, z>0}", "lhs": "(x*y*z)^(1/3)", "rhs": "(x+y+z)/3"}
+
+
+def test_chamber_decomposition_needs_the_same_chamber(tmp_path):
+    cert = ProofCertificate(kind="question", problem=dict(AM_GM), decomposition=["True"],
+                            checks=[Check(region="x<=y && y<=z && (True)", constant=0, query="q", verdict="True")],
+                            chamber=[["x", "y", "z"]])
+    save(cert, str(tmp_path))
+    index = RetrievalIndex.open(str(tmp_path))
+    skewed = {**AM_GM, "rhs": "(x+7*y+z)/3"}
+    assert index.nearest("question", skewed, chamber=Chamber([["x", "z"]])) == []
+    assert index.nearest("question", skewed) == []
+    assert index.nearest("question", AM_GM, chamber=Chamber([["x", "y", "z"]])) == [(1.0, ["True"])]
+
+
+def test_concurrent_index_saves(tmp_path):
+    save(_cert(["x<=2*Log[y]", "x>2*Log[y]"]), str(tmp_path))
+    index = RetrievalIndex.open(str(tmp_path))
+    errors = []
+
+    def run():
+        try:
+            for _ in range(20):
+                index.save()
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert [n for n in os.listdir(tmp_path) if n.endswith(".tmp")] == []
+    assert RetrievalIndex.open(str(tmp_path)).entries == index.entries
@@ -0,0 +1,17 @@
+from shared import split_conditions, split_top_level
+
+
+def test_split_top_level_ignores_nested_separators():
+    assert split_top_level("{0, h, Log[h, m], Infinity}"[1:-1]) == ["0", "h", "Log[h, m]", "Infinity"]
+    assert split_top_level("x>0 && (y>x && z>y)", "&&") == ["x>0", "(y>x && z>y)"]
+
+
+def test_split_conditions_flattens_parenthesized_conjunctions():
+    assert split_conditions("x<=y && y<=z && (z>=2*y)") == ["x<=y", "y<=z", "z>=2*y"]
+    assert split_conditions("{x>0, (y>=x && z>=y) && (True)}") == ["x>0", "y>=x", "z>=y"]
+    assert split_conditions("x<=y && (True)") == ["x<=y"]
+
+
+def test_split_conditions_keeps_disjunctions_whole():
+    assert split_conditions("x>0, (x<1 || y>2)") == ["x>0", "(x<1 || y>2)"]
+    assert split_conditions("Max[x, y] > 1 && y > 0") == ["Max[x, y] > 1", "y > 0"]
@@ -0,0 +1,82 @@
+import os
+import re
+
+os.environ.setdefault("WOLFRAMSCRIPT", "/bin/true")
+
+import pytest  # noqa: E402
+
+import sweep  # noqa: E402
+from certificates import load_all  # noqa: E402
+from mathematica_export import question  # noqa: E402
+from series_summation import series_to_bound  # noqa: E402
+
+TEMPLATE = question(variables="{x,y}", domain_description="{x>0, y>1}", lhs="x^a*y", rhs="y*Log[y]+Exp[x]")
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setenv("DECOMP_CERTIFICATES", str(tmp_path))
+    return str(tmp_path)
+
+
+def _kernel(verdict):
+    """evaluate() stand-in answering every call of a batch with verdict(call)."""
+    sent = []
+
+    def evaluate(code):
+        calls = [line for line in code.splitlines() if line.lstrip("{").startswith("witnessBigO[{")]
+        sent.append(calls)
+        return "{" + ", ".join(verdict(call) for call in calls) + "}"
+
+    return evaluate, sent
+
+
+def test_one_batch_for_the_shared_decomposition(store, monkeypatch):
+    asked = []
+    monkeypatch.setattr(sweep, "propose_subdomains", lambda q: asked.append(q.lhs) or ["x<=Log[y]", "x>Log[y]"])
+    evaluate, sent = _kernel(lambda call: "True")
+    members = sweep.sweep_question(TEMPLATE, "a", ["1", "2", "1/2"], evaluate=evaluate)
+    assert asked == ["x^(1)*y"]
+    assert len(sent) == 1 and len(sent[0]) == 6
+    assert all(m.proved and not m.redecomposed for m in members)
+    assert len(load_all(store)) == 3
+
+
+def test_verdicts_are_split_per_member_and_only_failures_redecomposed(store, monkeypatch):
+    regions = {"x^(1)*y": ["x<=Log[y]", "x>Log[y]"], "x^(2)*y": ["x<=1", "x>1"]}
+    asked = []
+    monkeypatch.setattr(sweep, "propose_subdomains", lambda q: asked.append(q.lhs) or regions.get(q.lhs, ["x<=1", "x>1"]))
+    # a = 2 fails only in x > Log[y], and only that member asks again
+    evaluate, sent = _kernel(lambda call: "False" if "x^(2)" in call and "x>Log[y]" in call else "True")
+    one, two, three = sweep.sweep_question(TEMPLATE, "a", ["1", "2", "3"], evaluate=evaluate)
+    assert one.verdicts == ["True", "True"] and three.verdicts == ["True", "True"]
+    assert two.redecomposed and two.decomposition == ["x<=1", "x>1"] and two.proved
+    assert not one.redecomposed and not three.redecomposed
+    assert asked == ["x^(1)*y", "x^(2)*y"]
+    assert [len(calls) for calls in sent] == [6, 2]
+
+
+def test_members_that_still_fail_are_not_saved(store, monkeypatch):
+    monkeypatch.setattr(sweep, "propose_subdomains", lambda q: ["True"])
+    evaluate, _ = _kernel(lambda call: "False" if "x^(3)" in call else "True")
+    members = sweep.sweep_question(TEMPLATE, "a", ["1", "3"], evaluate=evaluate)
+    assert [m.proved for m in members] == [True, False]
+    assert [c.problem["lhs"] for c in load_all(store)] == ["x^(1)*y"]
+
+
+def test_series_sweep_redecomposes_only_failing_members(store, monkeypatch):
+    template = series_to_bound(formula="1/(d^2+h^a)", conditions="h > 1", summation_index="d",
+                               other_variables="{h}", summation_bounds=["1", "Infinity"],
+                               conjectured_upper_asymptotic_bound="1")
+    asked = []
+    monkeypatch.setattr(sweep, "propose_breakpoints", lambda s: asked.append(s.formula) or "[1, h, Infinity]")
+    monkeypatch.setattr(sweep, "series_estimates", lambda s, points, *rest: f"est[{s.formula}, {points}]")
+
+    def evaluate(code):
+        blocks = re.findall(r"est\[(.*?)\]", code)
+        return "{" + ", ".join("False" if "h^(2)" in b and len(asked) == 1 else "True" for b in blocks) + "}"
+
+    one, two = sweep.sweep_series(template, "a", ["1", "2"], evaluate=evaluate)
+    assert one.proved and not one.redecomposed
+    assert two.proved and two.redecomposed
+    assert asked == ["1/(d^2+h^(1))", "1/(d^2+h^(2))"]
@@ -0,0 +1,33 @@
+from symmetry import scaling_reduction, symmetric_chamber
+
+
+def test_homogeneous_estimate_fixes_one_variable():
+    red = scaling_reduction("{x,y,z}", "x>0, y>0, z>0", "(x*y*z)^(1/3)", "(x+y+z)/3")
+    assert red is not None
+    assert red.variable == "x" and red.weights == {"x": 1, "y": 1, "z": 1}
+    assert red.variables == "{y, z}"
+    assert "x" not in red.lhs + red.rhs + red.conditions
+
+
+def test_weighted_scaling():
+    red = scaling_reduction("{x,y}", "x>0, y>0", "x*y^2", "x^2 + y^4")
+    assert red is not None and red.weights == {"x": 2, "y": 1}
+
+
+def test_no_reduction_when_something_breaks_the_scaling():
+    assert scaling_reduction("{x,y}", "x>0, y>0", "x+y", "x+y+1") is None
+    assert scaling_reduction("{x,y}", "x>0, y>1", "x", "x+y") is None
+    assert scaling_reduction("{x,y}", "x>0, y>0 || x<y", "x", "x+y") is None
+
+
+def test_symmetric_chamber_of_am_gm():
+    chamber = symmetric_chamber("{x,y,z}", "x>0, y>0, z>0", "(x*y*z)^(1/3)", "(x+y+z)/3")
+    assert chamber is not None
+    assert chamber.classes == [["x", "y", "z"]]
+    assert chamber.condition == "x<=y && y<=z"
+
+
+def test_partial_and_missing_symmetry():
+    chamber = symmetric_chamber("{x,y,z}", "x>0, y>0, z>1", "x*y*z", "x^3+y^3+z^3")
+    assert chamber is not None and chamber.classes == [["x", "y"]]
+    assert symmetric_chamber("{x,y}", "x>0, y>1", "x*y", "y*Log[y]+Exp[x]") is None
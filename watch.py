@@ -0,0 +1,163 @@
+"""Re-verify the examples incrementally while examples.py is being edited.
+
+Every `question` / `series_to_bound` in the file is fingerprinted with
+`certificates.problem_key`. When the file changes, only the problems whose
+fingerprint changed are run again; unchanged ones keep their previous
+decomposition and verdict, and problems that already have a proved
+certificate in the store are not run at all. A problem that was edited
+first tries the decomposition it had before the edit, then falls back to
+the full pipeline; a decomposition that only covered a symmetric chamber
+is only reused while the edited problem has the same chamber. The status
+table is reprinted after every problem.
+"""
+import os
+import runpy
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from certificates import load, problem_key
+from mathematica_export import question, try_and_prove, verify_subdomains
+from series_summation import ask_llm_series, series_to_bound, verify_breakpoints
+from symmetry import symmetric_chamber
+
+__all__ = ["WatchEntry", "scan", "run_once", "watch"]
+
+
+@dataclass
+class WatchEntry:
+    kind: str
+    key: str
+    status: str = "pending"
+    decomposition: List[str] = field(default_factory=list)
+    # Chamber classes the decomposition covers (see `certificates.ProofCertificate`)
+    chamber: List[List[str]] = field(default_factory=list)
+    constant: Optional[int] = None
+    detail: str = ""
+
+
+def scan(path: str) -> Dict[str, Tuple[str, Any]]:
+    """name -> (kind, problem) for every public example object in `path`."""
+    found = {}
+    for name, obj in runpy.run_path(path).items():
+        if name.startswith("_"):
+            continue
+        if isinstance(obj, series_to_bound):
+            found[name] = ("series", obj)
+        elif isinstance(obj, question):
+            found[name] = ("question", obj)
+    return found
+
+
+def _from_certificate(entry: WatchEntry, kind: str, problem: Any) -> bool:
+    try:
+        cert = load(kind, problem)
+    except (OSError, ValueError, TypeError, KeyError):
+        return False
+    if cert is None or not cert.proved:
+        return False
+    entry.status = "proved"
+    entry.decomposition = list(cert.decomposition)
+    entry.chamber = [list(cls) for cls in cert.chamber]
+    entry.constant = max(ch.constant for ch in cert.checks)
+    return True
+
+
+def _run(kind: str, problem: Any, previous: Optional[WatchEntry]) -> WatchEntry:
+    entry = WatchEntry(kind=kind, key=problem_key(kind, problem))
+    try:
+        # Edited problem: its old decomposition is the cheapest thing to try
+        chamber = None
+        if kind == "question":
+            chamber = symmetric_chamber(problem.variables, problem.domain_description, problem.lhs, problem.rhs)
+        reusable = previous is not None and previous.decomposition and (
+            not previous.chamber or (chamber is not None and chamber.classes == previous.chamber)
+        )
+        if reusable:
+            print("Trying the decomposition from before the edit")
+            if kind == "question":
+                verify_subdomains(problem, previous.decomposition, chamber=chamber)
+            else:
+                verify_breakpoints(problem, "{" + ", ".join(previous.decomposition) + "}")
+            if _from_certificate(entry, kind, problem):
+                entry.detail = "reused previous decomposition"
+                return entry
+        if kind == "question":
+            proved = try_and_prove(problem)
+        else:
+            proved = ask_llm_series(problem)
+    except KeyboardInterrupt:
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        entry.status = "error"
+        entry.detail = f"{type(e).__name__}: {e}"
+        return entry
+    if not _from_certificate(entry, kind, problem):
+        # Proved from certified lemmas leaves no certificate of its own
+        entry.status = "proved" if proved else "not proved"
+        entry.detail = "from lemmas" if proved else ""
+    return entry
+
+
+def print_status(state: Dict[str, WatchEntry], path: str) -> None:
+    width = max([4] + [len(n) for n in state])
+    print(f"\n== {os.path.basename(path)} @ {time.strftime('%H:%M:%S')} ==")
+    for name in sorted(state):
+        e = state[name]
+        const = f"C = 10^{e.constant}" if e.constant is not None else ""
+        pieces = f"{len(e.decomposition)} piece(s)" if e.decomposition else ""
+        extra = ", ".join(x for x in (const, pieces, e.detail) if x)
+        print(f"  {name:<{width}}  {e.kind:<8}  {e.status:<10}  {extra}")
+    print()
+
+
+def run_once(path: str, state: Dict[str, WatchEntry]) -> Dict[str, WatchEntry]:
+    """Bring `state` up to date with the examples currently in `path`."""
+    found = scan(path)
+    new_state: Dict[str, WatchEntry] = {}
+    todo = []
+    for name, (kind, problem) in found.items():
+        key = problem_key(kind, problem)
+        old = state.get(name)
+        if old is not None and old.kind == kind and old.key == key and old.status != "pending":
+            new_state[name] = old
+            continue
+        entry = WatchEntry(kind=kind, key=key)
+        if _from_certificate(entry, kind, problem):
+            entry.detail = "certificate"
+        else:
+            todo.append((name, kind, problem, old if old is not None and old.kind == kind else None))
+        new_state[name] = entry
+
+    print_status(new_state, path)
+    for name, kind, problem, old in sorted(todo, key=lambda t: t[0]):
+        print(f"--- {name} ---")
+        new_state[name] = _run(kind, problem, old)
+        print_status(new_state, path)
+    return new_state
+
+
+def watch(path: str = "examples.py", interval: float = 1.0) -> None:
+    """Poll `path` and re-verify whatever changed, until interrupted."""
+    path = os.path.abspath(path)
+    state: Dict[str, WatchEntry] = {}
+    seen = None
+    print(f"Watching {path} (Ctrl-C to stop)")
+    try:
+        while True:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime is not None and mtime != seen:
+                seen = mtime
+                try:
+                    state = run_once(path, state)
+                except Exception as e:
+                    # Typically a half-written file; keep the last good state
+                    print(f"Could not load {os.path.basename(path)}: {type(e).__name__}: {e}")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("Stopped watching")